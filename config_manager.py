@@ -1,4 +1,5 @@
 import os
+import io
 import json
 import csv
 import tempfile
@@ -399,6 +400,22 @@ class ConfigManager:
         self._log(f"无法加载CSV文件: {filename}，尝试了所有编码均失败")
         return {}
 
+    @staticmethod
+    def _open_csv_for_write(csv_path: str):
+        """
+        以 UTF-8 带 BOM（兼容 Excel）打开 CSV 文件用于写入
+        
+        BOM 以字节直接写入，之后按普通 utf-8 编码：utf-8-sig 的增量编码器是 Python 实现，
+        而 utf-8 走 TextIOWrapper 的 C 快速路径
+        """
+        raw = open(csv_path, "wb")
+        try:
+            raw.write(b"\xef\xbb\xbf")
+            return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        except BaseException:
+            raw.close()
+            raise
+
     def save_tags_csv(self, filename: str, tags: dict) -> bool:
         """保存标签数据到CSV文件"""
         csv_path = os.path.join(self.tags_dir, filename)
@@ -435,7 +452,7 @@ class ConfigManager:
                 # 如果数据为空，写入只含表头的文件或保持现状？
                 # 通常为了防止误删，如果 tags 为空暂不操作或清空文件。
                 # 这里选择写入表头：
-                with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+                with self._open_csv_for_write(csv_path) as f:
                     writer = csv.writer(f)
                     writer.writerow(["标签名", "标签值"])
                 return True
@@ -447,7 +464,7 @@ class ConfigManager:
                 suffix = num_zh[i] if i < len(num_zh) else str(i + 1)
                 header.append(f"{suffix}级分类")
             
-            with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            with self._open_csv_for_write(csv_path) as f:
                 writer = csv.writer(f)
                 writer.writerow(header)
                 for row in rows:
@@ -167,7 +167,8 @@ async function showFrameExtractionModal(node) {
         // 帧索引驱动相关状态
         currentFrameIndex: 0,  // 当前帧索引
         isLoading: false,  // 帧加载中标志
-        frameCache: new Map(),  // 帧缓存 (frameIndex -> base64)
+        isClosed: false,  // 本弹窗已关闭（关闭后返回的帧不再写入缓存）
+        frameCache: new Map(),  // 帧缓存 (frameIndex -> 图片 Blob URL)
         filename: videoInfo.filename,  // 视频文件名
         widgets: {
             // 使用后端定义的英文 widget 名称
@@ -247,9 +248,17 @@ async function showFrameExtractionModal(node) {
         // 关闭回调：清理资源
         onClose: () => {
             isDialogOpen = false;
+            state.isClosed = true;
             if (state.frameCache) {
+                // 释放 Blob URL 占用的内存
+                state.frameCache.forEach(src => URL.revokeObjectURL(src));
                 state.frameCache.clear();
             }
+            // 通知后端释放该视频的帧读取器（静默忽略失败，后端空闲超时后也会自动释放）
+            api.fetchApi(APIService.getDynamicApiBase() + '/video/release', {
+                method: "POST",
+                body: JSON.stringify({ filename: state.filename })
+            }).catch(() => { });
         }
     });
 }
@@ -352,7 +361,7 @@ function renderVideoInterface(container, state, videoInfo, headerElement) {
 
         // 检查缓存
         if (state.frameCache.has(frameIndex)) {
-            frameImg.src = `data:image/jpeg;base64,${state.frameCache.get(frameIndex)}`;
+            frameImg.src = state.frameCache.get(frameIndex);
             updateDisplay();
             return;
         }
@@ -362,24 +371,31 @@ function renderVideoInterface(container, state, videoInfo, headerElement) {
         loadingIndicator.style.display = "flex";
 
         try {
-            const response = await api.fetchApi(APIService.getDynamicApiBase() + '/video/frame', {
-                method: "POST",
-                body: JSON.stringify({
-                    filename: state.filename,
-                    frame_index: frameIndex,
-                    force_rate: state.forceRate
-                })
+            // 二进制 JPEG 接口：省去 base64 编解码，传输量更小
+            const params = new URLSearchParams({
+                filename: state.filename,
+                frame_index: frameIndex,
+                force_rate: state.forceRate
             });
-            const data = await response.json();
-
-            if (data.success && data.data) {
-                // 缓存帧数据
-                state.frameCache.set(frameIndex, data.data);
-                frameImg.src = `data:image/jpeg;base64,${data.data}`;
+            const response = await api.fetchApi(APIService.getDynamicApiBase() + `/video/frame/jpeg?${params}`);
+
+            if (response.ok) {
+                const blob = await response.blob();
+                // 弹窗已关闭时缓存已清空，此时创建的 Blob URL 不会再被释放
+                if (state.isClosed) return;
+
+                // 缓存帧数据（等待期间预加载已取到该帧时直接复用，只为写入缓存的帧创建 Blob URL）
+                let src = state.frameCache.get(frameIndex);
+                if (!src) {
+                    src = URL.createObjectURL(blob);
+                    state.frameCache.set(frameIndex, src);
+                }
+                frameImg.src = src;
 
                 // 预加载相邻帧（提升体验）
                 preloadAdjacentFrames(frameIndex);
             } else {
+                const data = await response.json().catch(() => ({}));
                 console.error("[PromptAssistant-CaptionFrame] 帧加载失败:", data.error);
             }
         } catch (e) {
@@ -394,26 +410,41 @@ function renderVideoInterface(container, state, videoInfo, headerElement) {
     // --- 预加载相邻帧（提升体验）---
     const preloadAdjacentFrames = async (centerIndex) => {
         const preloadRange = 2; // 预加载前后2帧
+        const indices = [];
         for (let offset = 1; offset <= preloadRange; offset++) {
-            const indices = [centerIndex - offset, centerIndex + offset];
-            for (const idx of indices) {
+            for (const idx of [centerIndex - offset, centerIndex + offset]) {
                 if (idx >= 0 && idx < state.totalFrames && !state.frameCache.has(idx)) {
-                    // 异步预加载，不阻塞
-                    api.fetchApi(APIService.getDynamicApiBase() + '/video/frame', {
-                        method: "POST",
-                        body: JSON.stringify({
-                            filename: state.filename,
-                            frame_index: idx,
-                            force_rate: state.forceRate
-                        })
-                    }).then(res => res.json()).then(data => {
-                        if (data.success && data.data) {
-                            state.frameCache.set(idx, data.data);
-                        }
-                    }).catch(() => { }); // 静默忽略预加载失败
+                    indices.push(idx);
                 }
             }
         }
+        if (indices.length === 0) return;
+
+        // 一次请求批量获取相邻帧的二进制 JPEG，后端与单帧接口取帧方式一致（异步预加载，不阻塞）
+        api.fetchApi(APIService.getDynamicApiBase() + '/video/frames/jpeg', {
+            method: "POST",
+            body: JSON.stringify({
+                filename: state.filename,
+                frame_indices: indices,
+                force_rate: state.forceRate
+            })
+        }).then(async res => {
+            if (!res.ok) return;
+            const sizes = (res.headers.get("X-Frame-Sizes") || "").split(",").map(Number);
+            const blob = await res.blob();
+            // 弹窗已关闭时缓存已清空，不再创建 Blob URL
+            if (state.isClosed) return;
+
+            // 按各帧字节数切分（slice 不复制数据），取帧失败的帧字节数为 0
+            let offset = 0;
+            indices.forEach((idx, i) => {
+                const size = sizes[i] || 0;
+                if (size > 0 && !state.frameCache.has(idx)) {
+                    state.frameCache.set(idx, URL.createObjectURL(blob.slice(offset, offset + size, "image/jpeg")));
+                }
+                offset += size;
+            });
+        }).catch(() => { }); // 静默忽略预加载失败
     };
 
     // --- 信息移动到标题栏 ---
@@ -20,7 +20,7 @@ from .utils.common import (
     # 统一日志函数和常量
     log_prepare, TASK_TRANSLATE, TASK_EXPAND, TASK_IMAGE_CAPTION, SOURCE_FRONTEND
 )
-from .utils.video import extract_frame_by_index, get_video_frame_info
+from .utils.video import extract_frame_by_index, extract_frames_by_indices, get_video_frame_info, release_video_readers
 
 # 动态获取插件目录名作为路由前缀的基础
 # 这样即使文件夹被重命名（例如加上 comfyui- 前缀），路由也会自动适配
@@ -39,6 +39,9 @@ config_manager.validate_and_fix_model_params()
 # 用于跟踪正在进行的异步任务
 ACTIVE_TASKS = {}
 
+# 批量取帧接口单次请求的帧数上限
+MAX_BATCH_FRAMES = 16
+
 # ---流式进度设置（运行时状态，实时生效无需重启）---
 _streaming_progress_enabled = True
 
@@ -1767,6 +1770,28 @@ async def llm_translate_stream(request):
         if request_id and request_id in ACTIVE_TASKS:
             del ACTIVE_TASKS[request_id]
 
+def _resolve_video_path(filename):
+    """解析前端传入的视频文件名为完整路径，找不到时返回 None"""
+    file_path = None
+    
+    # 1. 尝试直接作为绝对路径
+    if os.path.exists(filename):
+        file_path = filename
+    else:
+        # 2. 使用 ComfyUI 的路径解析
+        file_path = folder_paths.get_annotated_filepath(filename)
+    
+    if not file_path or not os.path.exists(file_path):
+        # 3. 尝试在 input 目录查找
+        input_dir = folder_paths.get_input_directory()
+        possible_path = os.path.join(input_dir, filename)
+        if os.path.exists(possible_path):
+            file_path = possible_path
+    
+    if not file_path or not os.path.exists(file_path):
+        return None
+    return file_path
+
 @PromptServer.instance.routes.post(f'{API_PREFIX}/video/info')
 async def get_video_info(request):
     """获取视频文件信息(FPS, 时长等)"""
@@ -1780,27 +1805,13 @@ async def get_video_info(request):
             return web.json_response({"success": False, "error": "缺少文件名参数"}, status=400)
 
         # 获取文件完整路径
-        file_path = None
-        
-        # 1. 尝试直接作为绝对路径
-        if os.path.exists(filename):
-            file_path = filename
-        else:
-            # 2. 使用ComfyUI的路径解析
-            file_path = folder_paths.get_annotated_filepath(filename)
-        
-        if not file_path or not os.path.exists(file_path):
-            # 3. 尝试在input目录查找
-            input_dir = folder_paths.get_input_directory()
-            possible_path = os.path.join(input_dir, filename)
-            if os.path.exists(possible_path):
-                file_path = possible_path
-        
-        if not file_path or not os.path.exists(file_path):
+        file_path = _resolve_video_path(filename)
+        if not file_path:
             return web.json_response({"success": False, "error": "找不到视频文件"}, status=404)
 
         # 读取元数据
-        info_result = get_video_frame_info(file_path)
+        # 探测元数据会启动 ffprobe 子进程（回退时还要遍历数据包），放到线程中执行
+        info_result = await asyncio.to_thread(get_video_frame_info, file_path)
         if info_result["success"]:
             return web.json_response({
                 "success": True,
@@ -1877,45 +1888,33 @@ async def get_video_frame(request):
         filename: 视频文件名
         frame_index: 帧索引（基于 force_rate 后的帧序列）
         force_rate: 强制帧率（可选，0 表示原始帧率）
+        max_dim: 预览图最长边上限（可选，0 表示原始尺寸）
         type: 文件类型（input/output，默认 input）
     
     返回：
         success: 是否成功
         data: base64 编码的 JPEG 图片
-        width/height: 图片尺寸
+        width/height: 视频帧原始尺寸
+        encoded_width/encoded_height: 缩小编码时的图片尺寸（仅在缩小时返回）
     """
     try:
         data = await request.json()
         filename = data.get("filename")
         frame_index = data.get("frame_index", 0)
         force_rate = data.get("force_rate", 0)
+        max_dim = int(data.get("max_dim") or 0)
         type_ = data.get("type", "input")
         
         if not filename:
             return web.json_response({"success": False, "error": "缺少文件名参数"}, status=400)
         
         # 获取文件完整路径
-        file_path = None
-        
-        # 1. 尝试直接作为绝对路径
-        if os.path.exists(filename):
-            file_path = filename
-        else:
-            # 2. 使用 ComfyUI 的路径解析
-            file_path = folder_paths.get_annotated_filepath(filename)
-        
-        if not file_path or not os.path.exists(file_path):
-            # 3. 尝试在 input 目录查找
-            input_dir = folder_paths.get_input_directory()
-            possible_path = os.path.join(input_dir, filename)
-            if os.path.exists(possible_path):
-                file_path = possible_path
-        
-        if not file_path or not os.path.exists(file_path):
+        file_path = _resolve_video_path(filename)
+        if not file_path:
             return web.json_response({"success": False, "error": "找不到视频文件"}, status=404)
         
-        # 调用帧提取函数
-        result = extract_frame_by_index(file_path, frame_index, force_rate)
+        # 调用帧提取函数（解码和编码放到线程中执行，不阻塞事件循环）
+        result = await asyncio.to_thread(extract_frame_by_index, file_path, frame_index, force_rate, max_dim)
         
         if result["success"]:
             return web.json_response(result)
@@ -1924,4 +1923,178 @@ async def get_video_frame(request):
             
     except Exception as e:
         print(f"{ERROR_PREFIX} 帧提取失败 | 错误:{str(e)}")
-        return web.json_response({"success": False, "error": str(e)}, status=500)
\ No newline at end of file
+        return web.json_response({"success": False, "error": str(e)}, status=500)
+
+
+@PromptServer.instance.routes.get(f'{API_PREFIX}/video/frame/jpeg')
+async def get_video_frame_jpeg(request):
+    """
+    以二进制 JPEG 返回视频指定帧（可直接作为 <img> 的 src 或 fetch 为 Blob）
+    
+    与 /video/frame 相比省去 base64 编解码，传输量减少约 1/3；
+    /video/frame 的 base64 JSON 接口保留用于兼容
+    
+    查询参数：
+        filename: 视频文件名
+        frame_index: 帧索引（基于 force_rate 后的帧序列）
+        force_rate: 强制帧率（可选，0 表示原始帧率）
+        max_dim: 预览图最长边上限（可选，0 表示原始尺寸）
+    
+    返回：
+        image/jpeg 图片；帧尺寸等信息放在 X-Frame-Width / X-Frame-Height / X-Actual-Frame-Pos 响应头中
+        失败时返回 JSON 错误信息
+    """
+    try:
+        query = request.query
+        filename = query.get("filename")
+        frame_index = int(query.get("frame_index") or 0)
+        force_rate = float(query.get("force_rate") or 0)
+        max_dim = int(query.get("max_dim") or 0)
+        
+        if not filename:
+            return web.json_response({"success": False, "error": "缺少文件名参数"}, status=400)
+        
+        file_path = _resolve_video_path(filename)
+        if not file_path:
+            return web.json_response({"success": False, "error": "找不到视频文件"}, status=404)
+        
+        # 解码和编码放到线程中执行，不阻塞事件循环
+        result = await asyncio.to_thread(
+            extract_frame_by_index, file_path, frame_index, force_rate, max_dim, return_binary=True
+        )
+        if not result["success"]:
+            return web.json_response(result, status=500)
+        
+        return web.Response(
+            body=result["jpeg"],
+            content_type="image/jpeg",
+            headers={
+                "X-Frame-Width": str(result["width"]),
+                "X-Frame-Height": str(result["height"]),
+                "X-Actual-Frame-Pos": str(result["actual_frame_pos"]),
+                "Cache-Control": "no-cache",
+            }
+        )
+        
+    except Exception as e:
+        print(f"{ERROR_PREFIX} 帧提取失败 | 错误:{str(e)}")
+        return web.json_response({"success": False, "error": str(e)}, status=500)
+
+
+@PromptServer.instance.routes.post(f'{API_PREFIX}/video/frames')
+async def get_video_frames(request):
+    """
+    批量获取视频多个帧的图片（与 /video/frame 取帧方式一致，在线程中执行，不阻塞事件循环）
+    
+    请求参数：
+        filename: 视频文件名
+        frame_indices: 帧索引列表（基于 force_rate 后的帧序列，最多 MAX_BATCH_FRAMES 个）
+        force_rate: 强制帧率（可选，0 表示原始帧率）
+        max_dim: 预览图最长边上限（可选，0 表示原始尺寸）
+    
+    返回：
+        success: 是否成功
+        frames: 与 frame_indices 一一对应的结果，格式同 /video/frame
+    """
+    try:
+        data = await request.json()
+        filename = data.get("filename")
+        frame_indices = data.get("frame_indices") or []
+        force_rate = data.get("force_rate", 0)
+        max_dim = int(data.get("max_dim") or 0)
+        
+        if not filename:
+            return web.json_response({"success": False, "error": "缺少文件名参数"}, status=400)
+        if not isinstance(frame_indices, list):
+            return web.json_response({"success": False, "error": "frame_indices 必须是列表"}, status=400)
+        if len(frame_indices) > MAX_BATCH_FRAMES:
+            return web.json_response({"success": False, "error": f"frame_indices 最多 {MAX_BATCH_FRAMES} 个"}, status=400)
+        
+        file_path = _resolve_video_path(filename)
+        if not file_path:
+            return web.json_response({"success": False, "error": "找不到视频文件"}, status=404)
+        
+        frames = await asyncio.to_thread(
+            extract_frames_by_indices, file_path, [int(i) for i in frame_indices], force_rate, max_dim
+        )
+        return web.json_response({"success": True, "frames": frames})
+        
+    except Exception as e:
+        print(f"{ERROR_PREFIX} 批量帧提取失败 | 错误:{str(e)}")
+        return web.json_response({"success": False, "error": str(e)}, status=500)
+
+
+@PromptServer.instance.routes.post(f'{API_PREFIX}/video/frames/jpeg')
+async def get_video_frames_jpeg(request):
+    """
+    以二进制 JPEG 批量返回视频多个帧（请求参数同 /video/frames，省去 base64 编解码）
+    
+    返回：
+        各帧 JPEG 按 frame_indices 顺序首尾相接的二进制数据；
+        X-Frame-Sizes 响应头为逗号分隔的各帧字节数（取帧失败的帧为 0），前端按此切分
+        失败时返回 JSON 错误信息
+    """
+    try:
+        data = await request.json()
+        filename = data.get("filename")
+        frame_indices = data.get("frame_indices") or []
+        force_rate = data.get("force_rate", 0)
+        max_dim = int(data.get("max_dim") or 0)
+        
+        if not filename:
+            return web.json_response({"success": False, "error": "缺少文件名参数"}, status=400)
+        if not isinstance(frame_indices, list):
+            return web.json_response({"success": False, "error": "frame_indices 必须是列表"}, status=400)
+        if len(frame_indices) > MAX_BATCH_FRAMES:
+            return web.json_response({"success": False, "error": f"frame_indices 最多 {MAX_BATCH_FRAMES} 个"}, status=400)
+        
+        file_path = _resolve_video_path(filename)
+        if not file_path:
+            return web.json_response({"success": False, "error": "找不到视频文件"}, status=404)
+        
+        frames = await asyncio.to_thread(
+            extract_frames_by_indices, file_path, [int(i) for i in frame_indices], force_rate, max_dim,
+            return_binary=True
+        )
+        jpegs = [frame["jpeg"] if frame["success"] else b"" for frame in frames]
+        return web.Response(
+            body=b"".join(jpegs),
+            content_type="application/octet-stream",
+            headers={
+                "X-Frame-Sizes": ",".join(str(len(jpeg)) for jpeg in jpegs),
+                "Cache-Control": "no-cache",
+            }
+        )
+        
+    except Exception as e:
+        print(f"{ERROR_PREFIX} 批量帧提取失败 | 错误:{str(e)}")
+        return web.json_response({"success": False, "error": str(e)}, status=500)
+
+
+@PromptServer.instance.routes.post(f'{API_PREFIX}/video/release')
+async def release_video(request):
+    """
+    释放视频的帧读取器（抽帧弹窗关闭时调用，避免 ffmpeg 进程持有视频文件）
+    
+    请求参数：
+        filename: 视频文件名
+    
+    返回：
+        success: 是否成功
+    """
+    try:
+        data = await request.json()
+        filename = data.get("filename")
+        
+        if not filename:
+            return web.json_response({"success": False, "error": "缺少文件名参数"}, status=400)
+        
+        file_path = _resolve_video_path(filename)
+        if file_path:
+            # 关闭读取器会等待 ffmpeg 进程退出，放到线程中执行
+            await asyncio.to_thread(release_video_readers, file_path)
+        return web.json_response({"success": True})
+        
+    except Exception as e:
+        print(f"{ERROR_PREFIX} 释放视频读取器失败 | 错误:{str(e)}")
+        return web.json_response({"success": False, "error": str(e)}, status=500)
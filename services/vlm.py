@@ -11,7 +11,7 @@ from typing import Optional, Dict, Any, List, Callable
 import httpx
 from .openai_base import OpenAICompatibleService, filter_thinking_content
 from ..utils.common import (
-    format_api_error, preprocess_image, check_multi_image_support, ProgressBar,
+    format_api_error, preprocess_image, preprocess_images_batch, check_multi_image_support, ProgressBar,
     log_complete, log_error,
     PREFIX, PROCESS_PREFIX, WARN_PREFIX, ERROR_PREFIX, format_elapsed_time,
     TASK_IMAGE_CAPTION, TASK_VIDEO_CAPTION
@@ -542,17 +542,22 @@ class VisionService(OpenAICompatibleService):
 
             # 预处理所有图像（智能压缩：根据图像数量动态调整质量）
             img_count = len(images_data)
-            from ..utils.common import get_optimal_image_params
+            from ..utils.common import get_optimal_image_params, _data_url_bytes
             _, _, compression_level = get_optimal_image_params(img_count)
             
-            # 使用 ProgressBar 管理预处理进度
+            # 使用 ProgressBar 管理预处理进度（批量预处理静默执行，汇总信息并入完成日志，避免与进度行交错）
             pbar = ProgressBar(request_id=request_id, service_name="图像预处理", streaming=False)
-            processed_images = []
-            for idx, img in enumerate(images_data, 1):
-                processed = preprocess_image(img, request_id=request_id, silent=True, image_count=img_count)
-                processed_images.append(processed)
-            
-            pbar.done(f"{PREFIX} 🟡 预处理完成: {img_count}/{img_count} | 压缩:{compression_level}")
+            preprocess_start = time.perf_counter()
+            processed_images = preprocess_images_batch(images_data, image_count=img_count, request_id=request_id, silent=True)
+            preprocess_ms = int((time.perf_counter() - preprocess_start) * 1000)
+            bytes_in = sum(_data_url_bytes(img) for img in images_data)
+            bytes_out = sum(_data_url_bytes(img) for img in processed_images)
+            
+            pbar.done(
+                f"{PREFIX} 🟡 预处理完成: {img_count}/{img_count} | 压缩:{compression_level} | "
+                f"大小:{bytes_in/1024:.1f}KB→{bytes_out/1024:.1f}KB | "
+                f"耗时:{format_elapsed_time(preprocess_ms)}"
+            )
 
             # 获取系统提示词
             system_prompt = prompt_content or "请详细描述这些图片，分析它们之间的关系和差异。"
@@ -3,15 +3,14 @@
 提供图像tensor转换、哈希计算等通用图像处理方法
 """
 
-import base64
 import hashlib
-from io import BytesIO
 from typing import Optional
 
-import numpy as np
 import torch
 from PIL import Image
 
+from .common import _encode_jpeg_b64
+
 
 def tensor_to_base64(image_tensor: torch.Tensor, quality: int = 95) -> str:
     """
@@ -28,18 +27,21 @@ def tensor_to_base64(image_tensor: torch.Tensor, quality: int = 95) -> str:
     if len(image_tensor.shape) == 4:
         image_tensor = image_tensor[0]
     
-    # 转换为numpy数组并缩放到0-255范围
-    image_np = (image_tensor.cpu().numpy() * 255).astype(np.uint8)
+    # 转换到CPU并缩放到0-255范围(乘法、截断、类型转换一次完成,只分配一块缓冲)
+    t = image_tensor.detach()
+    if t.device.type != 'cpu':
+        t = t.cpu()
+    image_np = t.mul(255).clamp_(0, 255).to(torch.uint8).contiguous().numpy()
     
     # 创建PIL图像
     image = Image.fromarray(image_np)
     
-    # 转换为JPEG格式的字节流
-    buffer = BytesIO()
-    image.save(buffer, format="JPEG", quality=quality)
-    
-    # 转换为base64编码
-    encoded_image = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    # 编码为JPEG并转换为base64
+    # 高质量时关闭色度抽样;不开启 optimize(二次 Huffman 编码会显著增加编码耗时)
+    if quality >= 90:
+        encoded_image, _ = _encode_jpeg_b64(image, quality=quality, subsampling=0, optimize=False)
+    else:
+        encoded_image, _ = _encode_jpeg_b64(image, quality=quality)
     
     # 返回带有MIME类型的data URL
     return f"data:image/jpeg;base64,{encoded_image}"
@@ -55,7 +57,7 @@ def compute_image_hash(image_tensor: Optional[torch.Tensor]) -> str:
         image_tensor: 图像tensor,形状为 [B, H, W, C] 或 None
     
     返回:
-        MD5哈希值的十六进制字符串,如果输入为None或计算失败则返回 "0"
+        哈希值的十六进制字符串,如果输入为None或计算失败则返回 "0"
     """
     if image_tensor is None:
         return "0"
@@ -67,14 +69,17 @@ def compute_image_hash(image_tensor: Optional[torch.Tensor]) -> str:
             center_h, center_w = h // 2, w // 2
             size = min(100, h // 4, w // 4)  # 限制计算区域大小
             
-            img_data = image_tensor[0,
-                                   max(0, center_h - size):min(h, center_h + size),
-                                   max(0, center_w - size):min(w, center_w + size),
-                                   0].cpu().numpy().tobytes()
-            return hashlib.md5(img_data).hexdigest()
+            # 先在原设备上裁剪并整理为连续内存,只把裁剪区域传回主机
+            crop = image_tensor[0,
+                                max(0, center_h - size):min(h, center_h + size),
+                                max(0, center_w - size):min(w, center_w + size),
+                                0].contiguous()
+            img_data = crop.cpu().numpy().tobytes()
         else:
-            # 如果不是4D tensor,使用整个tensor的哈希
-            img_data = image_tensor.cpu().numpy().tobytes()
-            return hashlib.md5(img_data).hexdigest()
+            # 如果不是4D tensor,按步长采样整个tensor(最多约4096个元素)
+            flat = image_tensor.flatten()
+            step = max(1, flat.numel() // 4096)
+            img_data = flat[::step].contiguous().cpu().numpy().tobytes()
+        return hashlib.blake2b(img_data, digest_size=16).hexdigest()
     except Exception:
         return "0"
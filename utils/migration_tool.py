@@ -6,8 +6,246 @@
 """
 
 import os
+import io
+import copy
 import json
 import csv
+import hashlib
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache, partial
+from itertools import chain
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+try:
+    import ijson as _ijson
+except ImportError:
+    _ijson = None
+
+try:
+    import simdjson as _simdjson
+except ImportError:
+    _simdjson = None
+
+# 解析 JSON 时的格式错误（json/orjson 的解析错误和编码错误都是 ValueError 的子类）
+_JSON_READ_ERRORS = (ValueError,) + ((_ijson.JSONError,) if _ijson is not None else ())
+
+
+# 旧版 config.json 迁移时实际用到的顶层字段（其余已废弃的配置无需构建成 Python 对象）
+_LEGACY_CONFIG_KEYS = ('model_services', 'llm', 'vlm', 'current_services', 'baidu_translate')
+
+# 标签 CSV 表头及写入缓冲大小
+_TAGS_CSV_HEADER = ['标签名', '标签值', '一级分类', '二级分类', '三级分类', '四级分类']
+_CSV_WRITE_BUFFER = 1 << 20
+
+# CSV 批量写出：每攒够这么多行编码一次并写入文件；文件开头写入 UTF-8 BOM（兼容 Excel）
+_CSV_CHUNK_ROWS = 4096
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+# 补齐分类列用的空分类（最多4级）
+_EMPTY_CATEGORY_COLS = ("",) * 4
+
+# 旧版配置中带 API Key 的服务商
+_LEGACY_KEY_PROVIDERS = ('zhipu', 'siliconflow', 'custom')
+
+# 新建配置文件的权限（mkstemp 创建的临时文件为 0o600，替换前改为该权限）
+_NEW_FILE_MODE = 0o644
+
+# JSON 中不可变的叶子值，复制时直接共享引用
+_JSON_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _copy_json(value):
+    """
+    复制由 JSON 解析得到的数据
+
+    只包含 dict/list/标量的数据不需要 copy.deepcopy 的 memo 表和逐类型分派，
+    标量直接共享引用，容器逐层重建；其他类型仍回退到 deepcopy
+    """
+    if isinstance(value, _JSON_SCALAR_TYPES):
+        return value
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return copy.deepcopy(value)
+
+
+def _freeze(value):
+    """
+    将 JSON 数据转换为可哈希的等价形式，用于集合去重
+
+    dict → frozenset（键值对），list → tuple，标量原样返回；
+    转换前后相等关系保持一致（两个值相等当且仅当冻结后相等）
+    """
+    if isinstance(value, dict):
+        return frozenset((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@lru_cache(maxsize=128)
+def _parse_version(version) -> tuple:
+    """将版本号解析为整数元组（模板版本在每个文件的比对中重复出现，结果缓存复用）"""
+    return tuple(int(x) for x in str(version).split('.'))
+
+
+def _with_version_first(data: dict, version) -> dict:
+    """
+    返回版本号位于开头的新字典（只复制顶层）
+
+    先放入版本键再整体 update（C 实现），已有的版本键保持开头位置，最后统一写入目标版本
+    """
+    ordered = {'__config_version': version}
+    ordered.update(data)
+    ordered['__config_version'] = version
+    return ordered
+
+
+def _iter_csv_chunks(rows):
+    """
+    将 CSV 行按批格式化为 UTF-8 字节块，输出与 csv.writer 默认方言完全一致
+
+    绝大多数标签字段都是不含逗号、引号和换行的字符串，直接用逗号拼接即可；
+    其余行（需要加引号、含非字符串字段等）交给 csv.writer 格式化，保证转义规则不变
+
+    返回:
+        逐批产生 (字节块, 该块包含的行数)
+    """
+    fallback = io.StringIO()
+    fallback_writer = csv.writer(fallback)
+    lines = []
+    for row in rows:
+        try:
+            line = ','.join(row)
+        except TypeError:
+            line = None
+        if (line is None or len(row) < 2 or line.count(',') != len(row) - 1
+                or '"' in line or '\r' in line or '\n' in line):
+            fallback.seek(0)
+            fallback.truncate()
+            fallback_writer.writerow(row)
+            lines.append(fallback.getvalue())
+        else:
+            lines.append(line + '\r\n')
+        
+        if len(lines) >= _CSV_CHUNK_ROWS:
+            yield ''.join(lines).encode('utf-8'), len(lines)
+            lines.clear()
+    if lines:
+        yield ''.join(lines).encode('utf-8'), len(lines)
+
+
+# ---JSON 读写（优先使用 orjson，未安装时回退到标准库）---
+def _load_json(file_path: str):
+    """读取 JSON 文件"""
+    if _orjson is not None:
+        with open(file_path, 'rb') as f:
+            return _orjson.loads(f.read())
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _load_legacy_config(file_path: str):
+    """
+    读取旧版 config.json，只构建迁移用到的顶层字段
+
+    安装了 pysimdjson 时按需解析，未用到的字段不会转换为 Python 对象；
+    否则完整加载
+    """
+    if _simdjson is None:
+        return _load_json(file_path)
+    
+    with open(file_path, 'rb') as f:
+        doc = _simdjson.Parser().parse(f.read())
+    if not isinstance(doc, _simdjson.Object):
+        return doc.as_list() if isinstance(doc, _simdjson.Array) else doc
+    
+    legacy_data = {}
+    for key in _LEGACY_CONFIG_KEYS:
+        if key in doc:
+            value = doc[key]
+            if isinstance(value, _simdjson.Object):
+                value = value.as_dict()
+            elif isinstance(value, _simdjson.Array):
+                value = value.as_list()
+            legacy_data[key] = value
+    return legacy_data
+
+
+def _dump_json(file_path: str, data) -> bool:
+    """
+    以 2 空格缩进、保留非 ASCII 字符的格式写入 JSON 文件（UTF-8，LF 换行）
+
+    返回:
+        bool: 实际写入返回 True，内容未变化返回 False
+    """
+    if _orjson is not None:
+        content = _orjson.dumps(data, option=_orjson.OPT_INDENT_2 | _orjson.OPT_NON_STR_KEYS)
+    else:
+        content = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return _write_file_atomic(file_path, content)
+
+
+def _write_file_atomic(file_path: str, content: bytes) -> bool:
+    """
+    将字节内容写入文件
+
+    与现有文件内容完全一致时跳过写入（不改动文件和修改时间），
+    大小不同时只需一次 stat 即可判定需要写入；
+    写入先落到同目录的独立临时文件（多个写入方互不冲突）再原子替换，中途中断不会留下截断的文件；
+    替换后保留原文件权限，Windows 下目标文件被其他进程占用导致无法替换时退回到原地覆盖写入
+
+    返回:
+        bool: 实际写入返回 True，内容未变化返回 False
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        st = None  # 文件不存在或无法访问，直接写入
+    if st is not None and st.st_size == len(content):
+        try:
+            with open(file_path, 'rb') as f:
+                if f.read() == content:
+                    return False
+        except OSError:
+            pass
+    
+    # mkstemp 创建的文件权限为 0o600：已有文件沿用原权限，新文件使用固定权限
+    # （读取 umask 只能先设置再恢复，会在多线程下短暂改动整个进程的掩码，因此不读取）
+    mode = stat.S_IMODE(st.st_mode) if st is not None else _NEW_FILE_MODE
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(file_path)}.", suffix='.tmp', dir=os.path.dirname(file_path) or '.'
+    )
+    try:
+        try:
+            view = memoryview(content)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.chmod(tmp_path, mode)
+        try:
+            os.replace(tmp_path, file_path)
+        except PermissionError:
+            with open(file_path, 'wb') as f:
+                f.write(content)
+            os.remove(tmp_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
 
 
 class MigrationTool:
@@ -27,9 +265,11 @@ class MigrationTool:
         if logger:
             self._log_func = logger
         else:
+            # 清行前缀只在创建时导入一次，不在每条日志中重复导入（非终端输出时为空串）
+            from .common import _LINE_RESET
+            
             def default_logger(msg):
-                from .common import _ANSI_CLEAR_EOL
-                print(f"\r{_ANSI_CLEAR_EOL}{msg}", flush=True)
+                print(f"{_LINE_RESET}{msg}", flush=True)
             self._log_func = default_logger
             
         # 定义路径
@@ -37,10 +277,92 @@ class MigrationTool:
         self.config_dir = os.path.join(user_base_dir, "config")
         self.tags_dir = os.path.join(user_base_dir, "tags")
         self.rules_dir = os.path.join(user_base_dir, "rules")
+        
+        # 反复用到的文件路径只拼接一次
+        self._paths = {
+            'config': os.path.join(self.config_dir, "config.json"),
+            'active_prompts': os.path.join(self.config_dir, "active_prompts.json"),
+            'tags_user': os.path.join(self.config_dir, "tags_user.json"),
+            'migration_legacy_config': os.path.join(self.config_dir, ".migration_legacy_config.json"),
+            'system_prompts': os.path.join(self.rules_dir, "system_prompts.json"),
+            'kontext_presets': os.path.join(self.rules_dir, "kontext_presets.json"),
+            'migration_state': os.path.join(user_base_dir, ".migration_state"),
+        }
+        self._legacy_paths = self._build_legacy_paths(self.legacy_config_dir)
+
+        # 已确认存在的目录；用户目录在创建时一次性建好，后续逐个写文件时不再重复 makedirs
+        self._known_dirs = set()
+        for dir_path in (self.config_dir, self.tags_dir, self.rules_dir):
+            self._ensure_dir(dir_path)
+
+        # 本轮迁移写入过的文件: 绝对路径 -> ((mtime_ns, size), 数据)
+        self._parsed_cache = {}
+        
+        # 各配置文件并行处理时，保证日志逐行完整输出
+        self._log_lock = threading.Lock()
+        
+        # 逐字段的补全/覆盖日志默认汇总为一行，设置 PROMPT_ASSISTANT_VERBOSE=1 时逐条输出
+        self._verbose = os.environ.get('PROMPT_ASSISTANT_VERBOSE') == '1'
+        
+        # 本轮增量更新是否有文件处理出错（出错时不记录状态指纹，下次启动重新检查）
+        self._incremental_failed = False
             
+    def _ensure_dir(self, dir_path: str) -> None:
+        """确保目录存在（每个目录只在第一次用到时创建）"""
+        if dir_path not in self._known_dirs:
+            os.makedirs(dir_path, exist_ok=True)
+            self._known_dirs.add(dir_path)
+
+    @staticmethod
+    def _build_legacy_paths(legacy_dir: str) -> dict:
+        """拼接旧版本目录下各文件的路径"""
+        return {
+            key: os.path.join(legacy_dir, f"{key}.json")
+            for key in ('config', 'system_prompts', 'kontext_presets', 'tags', 'tags_user', 'tags_template')
+        }
+
     def _log(self, msg: str):
-        """统一日志调用层"""
-        self._log_func(msg)
+        """统一日志调用层（线程安全）"""
+        with self._log_lock:
+            self._log_func(msg)
+
+    @staticmethod
+    def _run_parallel(tasks: dict) -> dict:
+        """
+        并行执行互相独立的文件处理任务
+
+        参数:
+            tasks: {结果键: 无参可调用对象}
+
+        返回:
+            dict: {结果键: 任务返回值}，任务抛出的异常在收集结果时重新抛出
+        """
+        if len(tasks) <= 1:
+            return {key: task() for key, task in tasks.items()}
+        with ThreadPoolExecutor(max_workers=min(4, len(tasks))) as executor:
+            futures = {key: executor.submit(task) for key, task in tasks.items()}
+            return {key: future.result() for key, future in futures.items()}
+
+    # ---JSON 读写（带解析缓存）---
+    def _read_json(self, file_path: str):
+        """
+        读取 JSON 文件
+
+        本轮迁移刚写入且未被外部修改（mtime 和大小一致）的文件直接复用写入时的数据，
+        不再重新解析；返回深拷贝，调用方可以放心修改
+        """
+        cached = self._parsed_cache.get(os.path.abspath(file_path))
+        if cached is not None:
+            st = os.stat(file_path)
+            if cached[0] == (st.st_mtime_ns, st.st_size):
+                return _copy_json(cached[1])
+        return _load_json(file_path)
+
+    def _write_json(self, file_path: str, data) -> None:
+        """写入 JSON 文件，并记录到解析缓存供后续读取复用（缓存副本，调用方之后修改 data 不影响缓存）"""
+        _dump_json(file_path, data)
+        st = os.stat(file_path)
+        self._parsed_cache[os.path.abspath(file_path)] = ((st.st_mtime_ns, st.st_size), _copy_json(data))
 
     # ---版本比对工具---
     def _compare_versions(self, v1: str, v2: str) -> int:
@@ -52,17 +374,13 @@ class MigrationTool:
             0: v1 == v2
             -1: v1 < v2
         """
-        def parse(v):
-            return [int(x) for x in str(v).split('.')]
-        p1, p2 = parse(v1), parse(v2)
-        # 补齐长度
-        max_len = max(len(p1), len(p2))
-        p1.extend([0] * (max_len - len(p1)))
-        p2.extend([0] * (max_len - len(p2)))
-        for a, b in zip(p1, p2):
-            if a > b: return 1
-            if a < b: return -1
-        return 0
+        p1, p2 = _parse_version(v1), _parse_version(v2)
+        # 补齐长度后按元组逐位比较
+        if len(p1) < len(p2):
+            p1 += (0,) * (len(p2) - len(p1))
+        elif len(p2) < len(p1):
+            p2 += (0,) * (len(p1) - len(p2))
+        return (p1 > p2) - (p1 < p2)
 
     # ---config.json 专用迁移---
     def ensure_config_json_exists(self, file_path: str, default_data: dict, legacy_path: str = None) -> bool:
@@ -77,13 +395,12 @@ class MigrationTool:
         if os.path.exists(file_path):
             return False
         
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self._ensure_dir(os.path.dirname(file_path))
         
         # 检查旧版本文件
         if legacy_path and os.path.exists(legacy_path):
             try:
-                with open(legacy_path, 'r', encoding='utf-8') as f:
-                    legacy_data = json.load(f)
+                legacy_data = _load_legacy_config(legacy_path)
                 
                 # 执行专用迁移：提取 API Key 和模型信息
                 migrated_data = self._migrate_config_api_keys_to_services(legacy_data, default_data)
@@ -108,7 +425,6 @@ class MigrationTool:
         3. 如果找到，填入 API Key 和模型信息
         4. 如果找不到，创建新服务商
         """
-        import copy
         result = copy.deepcopy(default_data)
         
         # 提取旧配置中的服务信息
@@ -122,11 +438,12 @@ class MigrationTool:
         service_id_map = {s.get('id'): i for i, s in enumerate(new_services)}
         
         for legacy_service in legacy_services:
-            api_key = legacy_service.get('api_key', '').strip()
+            legacy_get = legacy_service.get
+            api_key = legacy_get('api_key', '').strip()
             if not api_key:
                 continue
             
-            service_id = legacy_service.get('id', '')
+            service_id = legacy_get('id', '')
             
             if service_id in service_id_map:
                 # 服务商存在，更新 API Key 和模型信息
@@ -135,7 +452,7 @@ class MigrationTool:
                 
                 # 迁移模型信息
                 for model_type in ['llm_models', 'vlm_models']:
-                    legacy_models = legacy_service.get(model_type, [])
+                    legacy_models = legacy_get(model_type, [])
                     if legacy_models:
                         new_services[idx][model_type] = legacy_models
                 
@@ -149,16 +466,16 @@ class MigrationTool:
                 # 服务商不存在，创建新服务商
                 new_service = {
                     'id': service_id,
-                    'type': legacy_service.get('type', 'openai_compatible'),
-                    'name': legacy_service.get('name', service_id),
-                    'description': legacy_service.get('description', f'{service_id}（从旧版迁移）'),
-                    'base_url': legacy_service.get('base_url', ''),
+                    'type': legacy_get('type', 'openai_compatible'),
+                    'name': legacy_get('name', service_id),
+                    'description': legacy_get('description', f'{service_id}（从旧版迁移）'),
+                    'base_url': legacy_get('base_url', ''),
                     'api_key': api_key,
-                    'disable_thinking': legacy_service.get('disable_thinking', True),
-                    'enable_advanced_params': legacy_service.get('enable_advanced_params', True),
-                    'filter_thinking_output': legacy_service.get('filter_thinking_output', True),
-                    'llm_models': legacy_service.get('llm_models', []),
-                    'vlm_models': legacy_service.get('vlm_models', [])
+                    'disable_thinking': legacy_get('disable_thinking', True),
+                    'enable_advanced_params': legacy_get('enable_advanced_params', True),
+                    'filter_thinking_output': legacy_get('filter_thinking_output', True),
+                    'llm_models': legacy_get('llm_models', []),
+                    'vlm_models': legacy_get('vlm_models', [])
                 }
                 new_services.append(new_service)
                 self._log(f"[config.json] 创建新服务商: {service_id}")
@@ -241,10 +558,9 @@ class MigrationTool:
         try:
             # 确保版本号存在且在开头
             version = data.get('__config_version') or default_data.get('__config_version', '2.0')
-            data = {'__config_version': version, **{k: v for k, v in data.items() if k != '__config_version'}}
+            data = _with_version_first(data, version)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self._write_json(file_path, data)
             return True
         except Exception as e:
             self._log(f"保存文件失败 [{os.path.basename(file_path)}]: {str(e)}")
@@ -263,14 +579,13 @@ class MigrationTool:
         if os.path.exists(file_path):
             return False
         
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self._ensure_dir(os.path.dirname(file_path))
         
         try:
             # 移除版本号（这些文件不需要版本管理）
             data_to_save = {k: v for k, v in default_data.items() if not k.startswith('__')}
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, ensure_ascii=False, indent=2)
+            self._write_json(file_path, data_to_save)
             self._log(f"[{file_desc}] 文件不存在，创建默认配置...")
             return True
         except Exception as e:
@@ -300,13 +615,12 @@ class MigrationTool:
             return False
         
         # 确保目录存在
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self._ensure_dir(os.path.dirname(file_path))
         
         # 检查是否有旧版本文件
         if legacy_path and os.path.exists(legacy_path):
             try:
-                with open(legacy_path, 'r', encoding='utf-8') as f:
-                    legacy_data = json.load(f)
+                legacy_data = self._read_json(legacy_path)
                 
                 # 与默认配置合并，补全缺失的字段
                 merged_data = self._merge_with_defaults(legacy_data, default_data, file_desc)
@@ -333,7 +647,6 @@ class MigrationTool:
         返回:
             合并后的数据
         """
-        import copy
         result = copy.deepcopy(default_data)
         
         # 递归合并用户数据到结果中（用户数据优先）
@@ -349,24 +662,52 @@ class MigrationTool:
         - overlay 中存在的键覆盖 base 中的值
         - 如果都是 dict，递归合并
         - 跳过版本字段（由 _save_with_version 处理）
+        
+        使用显式栈逐层处理嵌套字典，避免深层配置的递归调用开销
         """
-        for key, value in overlay.items():
-            # 跳过版本字段
-            if key.startswith("__"):
-                continue
+        work = [(base, overlay)]
+        while work:
+            base_node, overlay_node = work.pop()
+            for key, value in overlay_node.items():
+                # 跳过版本字段
+                if key.startswith("__"):
+                    continue
                 
-            current_path = f"{path}.{key}" if path else key
-            
-            if key in base:
-                if isinstance(base[key], dict) and isinstance(value, dict):
-                    # 递归合并嵌套字典
-                    self._recursive_merge(base[key], value, file_desc, current_path)
+                if key in base_node:
+                    base_value = base_node[key]
+                    if isinstance(base_value, dict) and isinstance(value, dict):
+                        # 嵌套字典入栈，稍后合并
+                        work.append((base_value, value))
+                    else:
+                        # 直接覆盖（用户值优先）
+                        base_node[key] = value
                 else:
-                    # 直接覆盖（用户值优先）
-                    base[key] = value
-            else:
-                # overlay 中有但 base 中没有的键，直接添加（用户自定义内容）
-                base[key] = value
+                    # overlay 中有但 base 中没有的键，直接添加（用户自定义内容）
+                    base_node[key] = value
+
+    @staticmethod
+    def _list_dir_names(dir_path: str) -> set:
+        """列出目录下的条目名称（目录不存在或无法读取时返回空集合）"""
+        try:
+            with os.scandir(dir_path) as it:
+                return {entry.name for entry in it}
+        except OSError:
+            return set()
+
+    @cached_property
+    def _config_dir_entries(self) -> set:
+        """
+        用户 config 目录下的条目名称（首次用到时列举一次）
+
+        ensure_all_configs_exist 和 migrate_config_api_keys 共用同一次列举，
+        常规启动（文件齐全）时判断 config.json 是否存在不再需要额外的 stat；
+        在该目录中创建文件后调用 _invalidate_config_dir_entries 重新列举
+        """
+        return self._list_dir_names(self.config_dir)
+
+    def _invalidate_config_dir_entries(self) -> None:
+        """丢弃 config 目录的列举缓存"""
+        self.__dict__.pop('_config_dir_entries', None)
 
     def ensure_all_configs_exist(self, default_configs: dict, legacy_dir: str):
         """
@@ -376,45 +717,71 @@ class MigrationTool:
             default_configs: 默认配置字典
             legacy_dir: 旧版本文件目录
         """
+        paths = self._paths
+        legacy_paths = (
+            self._legacy_paths if legacy_dir == self.legacy_config_dir
+            else self._build_legacy_paths(legacy_dir)
+        )
+        
+        # 每个目录只列举一次，已存在的文件直接跳过，常规启动（文件齐全）时不再逐个 stat
+        config_names = self._config_dir_entries
+        rules_names = self._list_dir_names(self.rules_dir)
+        
+        # 各文件互不依赖，缺失的文件并行创建/迁移（I/O 期间释放 GIL）
+        tasks = {}
+        
         # config.json（使用专用迁移方法）
-        if 'config' in default_configs:
-            self.ensure_config_json_exists(
-                os.path.join(self.config_dir, "config.json"),
+        if 'config' in default_configs and "config.json" not in config_names:
+            tasks['config'] = partial(
+                self.ensure_config_json_exists,
+                paths['config'],
                 default_configs['config'],
-                os.path.join(legacy_dir, "config.json")
+                legacy_paths['config']
             )
         
         # system_prompts.json
-        if 'system_prompts' in default_configs:
-            self.ensure_config_exists(
-                os.path.join(self.rules_dir, "system_prompts.json"),
+        if 'system_prompts' in default_configs and "system_prompts.json" not in rules_names:
+            tasks['system_prompts'] = partial(
+                self.ensure_config_exists,
+                paths['system_prompts'],
                 default_configs['system_prompts'],
-                os.path.join(legacy_dir, "system_prompts.json"),
+                legacy_paths['system_prompts'],
                 "system_prompts.json"
             )
         
         # active_prompts.json 和 tags_user.json 不需要版本管理和迁移，
         # 直接在文件不存在时创建默认配置
-        self._ensure_simple_config(
-            os.path.join(self.config_dir, "active_prompts.json"),
-            default_configs.get('active_prompts', {}),
-            "active_prompts.json"
-        )
+        if "active_prompts.json" not in config_names:
+            tasks['active_prompts'] = partial(
+                self._ensure_simple_config,
+                paths['active_prompts'],
+                default_configs.get('active_prompts', {}),
+                "active_prompts.json"
+            )
         
-        self._ensure_simple_config(
-            os.path.join(self.config_dir, "tags_user.json"),
-            default_configs.get('tags_user', {"favorites": []}),
-            "tags_user.json"
-        )
+        if "tags_user.json" not in config_names:
+            tasks['tags_user'] = partial(
+                self._ensure_simple_config,
+                paths['tags_user'],
+                default_configs.get('tags_user', {"favorites": []}),
+                "tags_user.json"
+            )
         
         # kontext_presets.json
-        if 'kontext_presets' in default_configs:
-            self.ensure_config_exists(
-                os.path.join(self.rules_dir, "kontext_presets.json"),
+        if 'kontext_presets' in default_configs and "kontext_presets.json" not in rules_names:
+            tasks['kontext_presets'] = partial(
+                self.ensure_config_exists,
+                paths['kontext_presets'],
                 default_configs['kontext_presets'],
-                os.path.join(legacy_dir, "kontext_presets.json"),
+                legacy_paths['kontext_presets'],
                 "kontext_presets.json"
             )
+        
+        self._run_parallel(tasks)
+        
+        # 创建过文件后目录内容已变化，后续检查重新列举
+        if tasks:
+            self._invalidate_config_dir_entries()
 
     def migrate_incremental_updates(self, default_configs):
         """
@@ -429,16 +796,27 @@ class MigrationTool:
                 }
         """
         try:
-            results = {}
+            # 默认配置和用户配置文件都与上次完成增量更新时一致，无需读取和解析任何配置文件
+            state_key = self._incremental_state_key(default_configs)
+            if state_key is not None and state_key == self._read_migration_state():
+                return {
+                    f"{key}_update": False
+                    for key in ('config', 'system_prompts', 'kontext_presets')
+                    if key in default_configs
+                }
+            
+            # 各文件的增量更新互不依赖，并行执行
+            tasks = {}
             
             # 1. 更新 config.json
             if 'config' in default_configs:
-                results['config_update'] = self._update_config_json(default_configs['config'])
+                tasks['config_update'] = partial(self._update_config_json, default_configs['config'])
                 
             # 2. 更新 system_prompts.json
             if 'system_prompts' in default_configs:
-                results['system_prompts_update'] = self._update_json_file(
-                    os.path.join(self.rules_dir, "system_prompts.json"),
+                tasks['system_prompts_update'] = partial(
+                    self._update_json_file,
+                    self._paths['system_prompts'],
                     default_configs['system_prompts'],
                     "system_prompts"
                 )
@@ -448,18 +826,69 @@ class MigrationTool:
                  
             # 5. 更新 kontext_presets.json
             if 'kontext_presets' in default_configs:
-                results['kontext_presets_update'] = self._update_json_file(
-                    os.path.join(self.rules_dir, "kontext_presets.json"),
+                tasks['kontext_presets_update'] = partial(
+                    self._update_json_file,
+                    self._paths['kontext_presets'],
                     default_configs['kontext_presets'],
                     "kontext_presets"
                 )
                 
+            self._incremental_failed = False
+            results = self._run_parallel(tasks)
+            
+            # 全部成功时记录更新后的状态指纹
+            if not self._incremental_failed:
+                self._write_migration_state(self._incremental_state_key(default_configs))
             return results
             
         except Exception as e:
             self._log(f"增量更新失败: {str(e)}")
             return {}
 
+    def _incremental_state_key(self, default_configs):
+        """
+        计算增量更新的状态指纹
+        
+        由默认配置内容和各用户配置文件的 (mtime, 大小) 共同决定，
+        模板或用户文件任一发生变化（包括用户手动修改、替换）都会使指纹失效
+        
+        返回:
+            str: 十六进制指纹，默认配置无法序列化时返回 None（不走快速路径）
+        """
+        try:
+            if _orjson is not None:
+                payload = _orjson.dumps(default_configs, option=_orjson.OPT_SORT_KEYS | _orjson.OPT_NON_STR_KEYS)
+            else:
+                payload = json.dumps(default_configs, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        except (TypeError, ValueError):
+            return None
+        
+        digest = hashlib.blake2b(payload, digest_size=16)
+        for key in ('config', 'system_prompts', 'kontext_presets'):
+            try:
+                st = os.stat(self._paths[key])
+                digest.update(f"|{st.st_mtime_ns}:{st.st_size}".encode('ascii'))
+            except OSError:
+                digest.update(b"|-")
+        return digest.hexdigest()
+
+    def _read_migration_state(self):
+        """读取上次增量更新完成时记录的状态指纹（不存在时返回 None）"""
+        try:
+            with open(self._paths['migration_state'], 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _write_migration_state(self, state_key) -> None:
+        """记录状态指纹（写入失败只影响下次启动的快速路径，不影响迁移结果）"""
+        if state_key is None:
+            return
+        try:
+            _write_file_atomic(self._paths['migration_state'], state_key.encode('utf-8'))
+        except OSError:
+            pass
+
     def _update_config_json(self, default_config):
         """
         处理 config.json 的增量更新 (带版本检查)
@@ -470,13 +899,12 @@ class MigrationTool:
         3. model_services: 按 id 匹配，只补全用户已有服务的缺失字段（不追加新服务）
         4. 完成后同步版本号
         """
-        user_config_path = os.path.join(self.config_dir, "config.json")
+        user_config_path = self._paths['config']
         if not os.path.exists(user_config_path):
             return False
             
         try:
-            with open(user_config_path, 'r', encoding='utf-8') as f:
-                user_config = json.load(f)
+            user_config = self._read_json(user_config_path)
             
             # 获取版本号
             template_version = default_config.get('__config_version', '2.0')
@@ -484,9 +912,8 @@ class MigrationTool:
             
             # 如果用户文件没有版本号，只补上版本号（静默跳过）
             if user_version is None:
-                user_config = {'__config_version': template_version, **user_config}
-                with open(user_config_path, 'w', encoding='utf-8') as f:
-                    json.dump(user_config, f, ensure_ascii=False, indent=2)
+                user_config = _with_version_first(user_config, template_version)
+                self._write_json(user_config_path, user_config)
                 return True
             
             # 版本比对：模板版本 <= 用户版本时跳过
@@ -494,31 +921,36 @@ class MigrationTool:
             if cmp_result <= 0:
                 return False
             
-            import copy
-            
             # 1. 根级字段补全（排除 model_services，单独处理）
+            added_fields = 0
             for key, value in default_config.items():
                 if key == "model_services":
                     continue  # model_services 单独处理
                 if key not in user_config:
-                    user_config[key] = copy.deepcopy(value)
-                    self._log(f"[config.json] 补全根字段: {key}")
+                    user_config[key] = _copy_json(value)
+                    added_fields += 1
+                    if self._verbose:
+                        self._log(f"[config.json] 补全根字段: {key}")
                 elif isinstance(value, dict) and isinstance(user_config[key], dict):
                     # 递归合并嵌套字典（如 baidu_translate、current_services）
                     self._deep_merge_defaults(user_config[key], value)
             
             # 2. model_services 按 id 匹配合并
-            self._merge_model_services(user_config, default_config)
+            service_fields, added_services = self._merge_model_services(user_config, default_config)
+            added_fields += service_fields
             
             # 更新版本号（重构字典确保版本号在开头）
-            user_config = {'__config_version': template_version, **{k: v for k, v in user_config.items() if k != '__config_version'}}
+            user_config = _with_version_first(user_config, template_version)
             
-            with open(user_config_path, 'w', encoding='utf-8') as f:
-                json.dump(user_config, f, ensure_ascii=False, indent=2)
-            self._log(f"[config.json] 增量更新已完成 (v{user_version} -> v{template_version})")
+            self._write_json(user_config_path, user_config)
+            summary = f"[config.json] 增量更新已完成 (v{user_version} -> v{template_version})"
+            if added_fields or added_services:
+                summary += f"，补全 {added_fields} 个字段，追加 {added_services} 个服务商"
+            self._log(summary)
             return True
             
         except Exception as e:
+            self._incremental_failed = True
             self._log(f"[config.json] 更新检查出错: {str(e)}")
             return False
 
@@ -530,25 +962,34 @@ class MigrationTool:
         - 补全用户已有服务的缺失字段
         - 追加模板中用户不存在的服务商（版本更新时的新服务商）
         - 不覆盖 llm_models/vlm_models（用户自定义的模型列表）
+        
+        返回:
+            tuple: (补全的字段数, 追加的服务商数)
         """
+        filled_fields = 0
+        added_services = 0
+        
         if 'model_services' not in default_config:
-            return
+            return filled_fields, added_services
         
         if 'model_services' not in user_config:
             user_config['model_services'] = []
         
-        # 构建用户服务的 id 集合
-        user_service_ids = {s.get('id') for s in user_config['model_services'] if s.get('id')}
+        # 每个服务的 id 只提取一次，后续匹配和追加都复用
+        user_services = user_config['model_services']
+        template_services = default_config['model_services']
+        user_ids = [s.get('id') for s in user_services]
+        template_ids = [s.get('id') for s in template_services]
         
-        import copy
+        # 构建用户服务的 id 集合
+        user_service_ids = {sid for sid in user_ids if sid}
         
         # 1. 补全用户已有服务的缺失字段
         template_services_map = {
-            s.get('id'): s for s in default_config['model_services'] if s.get('id')
+            sid: s for sid, s in zip(template_ids, template_services) if sid
         }
         
-        for user_service in user_config['model_services']:
-            service_id = user_service.get('id')
+        for service_id, user_service in zip(user_ids, user_services):
             if not service_id or service_id not in template_services_map:
                 continue
             
@@ -561,19 +1002,24 @@ class MigrationTool:
                     # 模型列表不补全（用户自定义）
                     continue
                 if key not in user_service:
-                    user_service[key] = copy.deepcopy(value)
-                    self._log(f"[config.json] 补全服务 '{service_name}' 字段: {key}")
+                    user_service[key] = _copy_json(value)
+                    filled_fields += 1
+                    if self._verbose:
+                        self._log(f"[config.json] 补全服务 '{service_name}' 字段: {key}")
         
         # 2. 追加模板中用户不存在的服务商
-        for template_service in default_config['model_services']:
-            service_id = template_service.get('id')
+        for service_id, template_service in zip(template_ids, template_services):
             if not service_id or service_id in user_service_ids:
                 continue
             
             # 追加新服务商
-            new_service = copy.deepcopy(template_service)
-            user_config['model_services'].append(new_service)
-            self._log(f"[config.json] 追加新服务商: {new_service.get('name', service_id)}")
+            new_service = _copy_json(template_service)
+            user_services.append(new_service)
+            added_services += 1
+            if self._verbose:
+                self._log(f"[config.json] 追加新服务商: {new_service.get('name', service_id)}")
+        
+        return filled_fields, added_services
 
     def _update_json_file(self, file_path, default_data, file_desc):
         """
@@ -590,8 +1036,7 @@ class MigrationTool:
             return False
             
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                user_data = json.load(f)
+            user_data = self._read_json(file_path)
             
             # 获取版本号
             template_version = default_data.get('__config_version', '2.0')
@@ -599,7 +1044,7 @@ class MigrationTool:
             
             # 如果用户文件没有版本号，只补上版本号（静默处理）
             if user_version is None:
-                user_data = {'__config_version': template_version, **user_data}
+                user_data = _with_version_first(user_data, template_version)
                 self._save_with_version(file_path, user_data, default_data)
                 return True
             
@@ -617,27 +1062,28 @@ class MigrationTool:
             
             # ---特殊处理：为 system_prompts 中的所有规则补全 category 和 showIn 字段---
             if file_desc == "system_prompts":
-                modified = self._ensure_prompts_have_category(user_data) or modified
-                modified = self._ensure_prompts_have_show_in(user_data) or modified
+                modified = self._ensure_prompt_fields(user_data) or modified
             
             # 无论是否有字段变更，都需要更新版本号（重构字典确保版本号在开头）
-            user_data = {'__config_version': template_version, **{k: v for k, v in user_data.items() if k != '__config_version'}}
+            user_data = _with_version_first(user_data, template_version)
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, ensure_ascii=False, indent=2)
+            self._write_json(file_path, user_data)
             self._log(f"[{file_desc}.json] 增量更新已完成 (v{user_version} -> v{template_version})")
             return True
                 
         except Exception as e:
+            self._incremental_failed = True
             self._log(f"[{file_desc}.json] 更新检查出错: {str(e)}")
             return False
     
-    def _ensure_prompts_have_category(self, system_prompts_data):
+    def _ensure_prompt_fields(self, system_prompts_data):
         """
-        确保 system_prompts 中的所有规则都有 category 字段
+        确保 system_prompts 中的所有规则都有 category 和 showIn 字段
         
-        为所有规则类型（expand_prompts、vision_prompts、video_prompts）中的每个规则
-        补全 category 字段（默认值为空字符串）
+        一次遍历所有规则类型（expand_prompts、vision_prompts、video_prompts）中的每个规则，
+        补全缺失的字段:
+        - category: 默认值为空字符串
+        - showIn: 默认值为 ["frontend", "node"]
         
         返回是否发生了修改
         """
@@ -647,51 +1093,18 @@ class MigrationTool:
         prompt_types = ['expand_prompts', 'vision_prompts', 'video_prompts']
         
         for prompt_type in prompt_types:
-            if prompt_type not in system_prompts_data:
-                continue
-                
-            prompts = system_prompts_data[prompt_type]
+            prompts = system_prompts_data.get(prompt_type)
             if not isinstance(prompts, dict):
                 continue
                 
-            for prompt_id, prompt_data in prompts.items():
+            for prompt_data in prompts.values():
                 if not isinstance(prompt_data, dict):
                     continue
-                    
-                # 为规则补全 category 字段
+                
+                # 为规则补全缺失字段
                 if 'category' not in prompt_data:
                     prompt_data['category'] = ''
                     modified = True
-        
-        return modified
-
-    def _ensure_prompts_have_show_in(self, system_prompts_data):
-        """
-        确保 system_prompts 中的所有规则都有 showIn 字段
-        
-        为所有规则类型（expand_prompts、vision_prompts、video_prompts）中的每个规则
-        补全 showIn 字段（默认值为 ["frontend", "node"]）
-        
-        返回是否发生了修改
-        """
-        modified = False
-        
-        # 需要处理的规则类型
-        prompt_types = ['expand_prompts', 'vision_prompts', 'video_prompts']
-        
-        for prompt_type in prompt_types:
-            if prompt_type not in system_prompts_data:
-                continue
-                
-            prompts = system_prompts_data[prompt_type]
-            if not isinstance(prompts, dict):
-                continue
-                
-            for prompt_id, prompt_data in prompts.items():
-                if not isinstance(prompt_data, dict):
-                    continue
-                    
-                # 为规则补全 showIn 字段
                 if 'showIn' not in prompt_data:
                     prompt_data['showIn'] = ["frontend", "node"]
                     modified = True
@@ -712,8 +1125,8 @@ class MigrationTool:
         
         返回是否发生了修改
         """
-        import copy
         modified = False
+        overwritten = 0
         
         # 需要处理的规则类型
         prompt_types = ['expand_prompts', 'vision_prompts', 'video_prompts', 'translate_prompts']
@@ -743,9 +1156,14 @@ class MigrationTool:
                 # 检查用户配置中是否存在同名规则
                 if prompt_id in user_prompts:
                     # 用模板内容完整覆盖用户规则
-                    user_prompts[prompt_id] = copy.deepcopy(template_prompt)
+                    user_prompts[prompt_id] = _copy_json(template_prompt)
                     modified = True
-                    self._log(f"[system_prompts] 覆盖规则: {template_prompt.get('name', prompt_id)}")
+                    overwritten += 1
+                    if self._verbose:
+                        self._log(f"[system_prompts] 覆盖规则: {template_prompt.get('name', prompt_id)}")
+        
+        if overwritten and not self._verbose:
+            self._log(f"[system_prompts] 已用模板内容覆盖 {overwritten} 条内置规则")
         
         return modified
 
@@ -760,26 +1178,42 @@ class MigrationTool:
         返回是否发生了修改
         """
         modified = False
-        import copy
-        
-        # ---处理字典类型---
-        if isinstance(user_data, dict) and isinstance(default_data, dict):
-            for key, value in default_data.items():
-                if key not in user_data:
-                    # 字段不存在，直接添加
-                    user_data[key] = copy.deepcopy(value)
-                    modified = True
-                else:
-                    # 字段存在，递归检查
-                    if self._deep_merge_defaults(user_data[key], value):
-                        modified = True
         
-        # ---处理数组类型---
-        elif isinstance(user_data, list) and isinstance(default_data, list):
-            # 将模板数组中不存在于用户数组的元素追加到末尾
-            for item in default_data:
-                if item not in user_data:
-                    user_data.append(copy.deepcopy(item))
+        # 使用显式栈代替递归，各子树互不重叠，处理顺序不影响结果
+        work = [(user_data, default_data)]
+        while work:
+            user_node, default_node = work.pop()
+            
+            # ---处理字典类型---
+            if isinstance(user_node, dict) and isinstance(default_node, dict):
+                for key, value in default_node.items():
+                    if key not in user_node:
+                        # 字段不存在，直接添加
+                        user_node[key] = _copy_json(value)
+                        modified = True
+                    else:
+                        # 字段存在，入栈稍后检查
+                        work.append((user_node[key], value))
+            
+            # ---处理数组类型---
+            elif isinstance(user_node, list) and isinstance(default_node, list):
+                # 将模板数组中不存在于用户数组的元素追加到末尾
+                # 用集合判断是否已存在，避免逐个线性比较导致的 O(N²)
+                try:
+                    seen = {_freeze(x) for x in user_node}
+                except TypeError:
+                    # 含不可哈希的非 JSON 值时回退到逐个比较
+                    seen = None
+                for item in default_node:
+                    if seen is None:
+                        if item in user_node:
+                            continue
+                    else:
+                        frozen = _freeze(item)
+                        if frozen in seen:
+                            continue
+                        seen.add(frozen)
+                    user_node.append(_copy_json(item))
                     modified = True
                         
         return modified
@@ -807,35 +1241,33 @@ class MigrationTool:
             migrated_count = 0
             
             # ---处理 tags.json → 默认标签.csv---
+            # 按顶层分类逐个展开并直接写入 CSV，不在内存中同时保留完整的行列表
+            # 流式解析时文件内容的错误要到写入途中才会暴露：_write_tags_csv 会删除写了一半的文件，
+            # 这里按读取失败处理，不影响 tags_user.json 的迁移
             if tags_data:
-                csv_rows = []
-                self._extract_tags_recursive(tags_data, [], csv_rows)
-                
-                if csv_rows:
-                    csv_filename = "默认标签.csv"
-                    self._write_tags_csv(csv_rows, csv_filename)
-                    self._log(f"[tags.json] ✅ 成功迁移 {len(csv_rows)} 个标签到 {csv_filename}")
-                    migrated_count += len(csv_rows)
+                try:
+                    rows = self._iter_tags_rows(tags_data)
+                    first_row = next(rows, None)
+                    
+                    if first_row is not None:
+                        csv_filename = "默认标签.csv"
+                        tag_count = self._write_tags_csv(chain((first_row,), rows), csv_filename)
+                        self._log(f"[tags.json] ✅ 成功迁移 {tag_count} 个标签到 {csv_filename}")
+                        migrated_count += tag_count
+                except _JSON_READ_ERRORS as e:
+                    self._log(f"❗ 读取 tags.json 失败: {str(e)}")
+                    tags_data = None
             
             # ---处理 tags_user.json → 用户标签.csv---
             if user_tags_data:
-                csv_rows = []
                 # tags_user.json 是2层结构: {分类: {标签名: 标签值}}
-                for category, tags in user_tags_data.items():
-                    if not isinstance(tags, dict):
-                        continue
-                    
-                    for tag_name, tag_value in tags.items():
-                        # CSV 行: [标签名, 标签值, 一级分类, 二级分类, 三级分类, 四级分类]
-                        row = [
-                            tag_name,
-                            tag_value,
-                            category,
-                            "",  # 二级分类（空）
-                            "",  # 三级分类（空）
-                            ""   # 四级分类（空）
-                        ]
-                        csv_rows.append(row)
+                # CSV 行: (标签名, 标签值, 一级分类, 二级分类, 三级分类, 四级分类)，二~四级分类为空
+                csv_rows = [
+                    (tag_name, tag_value, category, "", "", "")
+                    for category, tags in user_tags_data.items()
+                    if type(tags) is dict
+                    for tag_name, tag_value in tags.items()
+                ]
                 
                 if csv_rows:
                     csv_filename = "用户标签.csv"
@@ -845,18 +1277,17 @@ class MigrationTool:
             
             # ---如果两个文件都不存在，尝试从模板创建默认标签---
             if not tags_data and not user_tags_data:
-                template_path = os.path.join(self.plugin_dir, "config", "tags_template.json")
+                template_path = self._legacy_paths['tags_template']
                 if os.path.exists(template_path):
                     try:
-                        with open(template_path, 'r', encoding='utf-8') as f:
-                            template_data = json.load(f)
+                        template_data = self._read_json(template_path)
                         
-                        csv_rows = []
-                        self._extract_tags_recursive(template_data, [], csv_rows)
+                        rows = self._iter_tags_rows(template_data.items())
+                        first_row = next(rows, None)
                         
-                        if csv_rows:
+                        if first_row is not None:
                             csv_filename = "默认标签.csv"
-                            self._write_tags_csv(csv_rows, csv_filename)
+                            self._write_tags_csv(chain((first_row,), rows), csv_filename)
                             self._log(f"✨ 检测到全新环境，已基于模板创建初始标签文件: {csv_filename}")
                             return True
                     except Exception as e:
@@ -876,16 +1307,15 @@ class MigrationTool:
             return False
     
     def _should_migrate_tags(self):
-        """检查是否需要迁移标签"""
-        # 检查 tags 目录是否存在
-        if not os.path.exists(self.tags_dir):
-            return True
-        
-        # 检查是否有 CSV 文件
+        """检查是否需要迁移标签（tags 目录不存在或其中没有 CSV 文件时需要迁移）"""
+        # 单次目录遍历，找到第一个 CSV 文件即返回
         try:
-            csv_files = [f for f in os.listdir(self.tags_dir) if f.endswith('.csv')]
-            return len(csv_files) == 0
-        except Exception:
+            with os.scandir(self.tags_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.csv'):
+                        return False
+            return True
+        except OSError:
             return True
     
     def _load_legacy_tags_json(self):
@@ -894,88 +1324,128 @@ class MigrationTool:
         
         返回:
             (tags_data, user_tags_data) 元组
+            tags_data 为 tags.json 顶层 (键, 值) 条目的迭代器（按需逐个解析），文件不存在或为空时为 None
         """
         tags_data = None
         user_tags_data = None
         
-        # 读取 tags.json
-        legacy_tags_path = os.path.join(self.legacy_config_dir, "tags.json")
+        # 读取 tags.json（先取出第一个顶层条目，确认文件可解析且非空）
+        legacy_tags_path = self._legacy_paths['tags']
         if os.path.exists(legacy_tags_path):
             try:
-                with open(legacy_tags_path, 'r', encoding='utf-8') as f:
-                    tags_data = json.load(f)
+                branches = self._iter_tags_json_branches(legacy_tags_path)
+                first_branch = next(branches, None)
+                if first_branch is not None:
+                    tags_data = chain((first_branch,), branches)
             except Exception as e:
                 self._log(f"❗ 读取 tags.json 失败: {str(e)}")
         
         # 读取 tags_user.json
-        legacy_user_tags_path = os.path.join(self.legacy_config_dir, "tags_user.json")
+        legacy_user_tags_path = self._legacy_paths['tags_user']
         if os.path.exists(legacy_user_tags_path):
             try:
-                with open(legacy_user_tags_path, 'r', encoding='utf-8') as f:
-                    user_tags_data = json.load(f)
+                user_tags_data = self._read_json(legacy_user_tags_path)
             except Exception as e:
                 self._log(f"❗ 读取 tags_user.json 失败: {str(e)}")
         
         return tags_data, user_tags_data
     
-    def _extract_tags_recursive(self, data, categories, csv_rows):
+    def _iter_tags_json_branches(self, file_path):
         """
-        递归提取标签数据
+        逐个读取 tags.json 的顶层 (分类/标签名, 值) 条目
+        
+        安装了 ijson 时流式解析，内存中每次只构建一个顶层分类；
+        否则整体加载后逐项返回
+        """
+        if _ijson is not None:
+            with open(file_path, 'rb') as f:
+                yield from _ijson.kvitems(f, '', use_float=True)
+            return
+        
+        data = self._read_json(file_path)
+        if isinstance(data, dict):
+            yield from data.items()
+    
+    def _iter_tags_rows(self, items, categories=()):
+        """
+        逐行提取标签数据
         
         根据嵌套深度判断是分类还是标签：
         - 如果值是字符串，则为标签（键=标签名，值=标签值）
-        - 如果值是字典，则为分类，继续递归
+        - 如果值是字典，则为分类，继续向下遍历
+        
+        使用显式栈按深度优先遍历（输出顺序与逐层递归一致），每层的分类列只构建一次；
+        逐行产生结果而不收集成列表，可直接交给 _write_tags_csv 边生成边写入
         
         参数:
-            data: 当前层级的数据字典
-            categories: 当前路径上的分类列表（最多4级）
-            csv_rows: 结果列表，用于收集CSV行
+            items: 当前层级的 (键, 值) 条目，可以是 dict.items() 或逐个解析的迭代器
+            categories: 当前路径上的分类（最多4级）
+        
+        返回:
+            CSV 行的生成器
         """
-        for key, value in data.items():
-            if isinstance(value, str):
-                # 值是字符串，说明当前键是标签名，值是标签值
-                # 构建CSV行：[标签名, 标签值, 一级分类, 二级分类, 三级分类, 四级分类]
-                row = [key, value]
+        # JSON 解析结果只会是内置类型本身，用精确类型比较代替 isinstance
+        str_type, dict_type = str, dict
+        
+        def frame(items, path):
+            # 栈帧: (键值迭代器, 分类路径, 补齐到4级的分类列)
+            category_cols = tuple(path[:4])
+            return items, path, category_cols + _EMPTY_CATEGORY_COLS[len(category_cols):]
+        
+        stack = [frame(iter(items), list(categories))]
+        while stack:
+            items, path, category_cols = stack[-1]
+            for key, value in items:
+                value_type = type(value)
+                if value_type is str_type:
+                    # 值是字符串，说明当前键是标签名，值是标签值
+                    # CSV行：(标签名, 标签值, 一级分类, 二级分类, 三级分类, 四级分类)
+                    # 每行只做一次元组拼接，分类列整层共享
+                    yield (key, value) + category_cols
                 
-                # 填充分类（共4级，不足的补空字符串）
-                for i in range(4):
-                    if i < len(categories):
-                        row.append(categories[i])
+                elif value_type is dict_type:
+                    # 值是字典，说明当前键是分类名，进入下一层
+                    # 限制最多4级分类，超过则忽略更深层级
+                    if len(path) < 4:
+                        stack.append(frame(iter(value.items()), path + [key]))
+                        break
                     else:
-                        row.append("")
-                
-                csv_rows.append(row)
-            
-            elif isinstance(value, dict):
-                # 值是字典，说明当前键是分类名，继续递归
-                # 限制最多4级分类，超过则忽略更深层级
-                if len(categories) < 4:
-                    new_categories = categories + [key]
-                    self._extract_tags_recursive(value, new_categories, csv_rows)
-                else:
-                    # 超过4级分类，记录警告并跳过
-                    self._log(f"⚠️ 分类层级超过4级，已忽略: {' → '.join(categories)} → {key}")
+                        # 超过4级分类，记录警告并跳过
+                        self._log(f"⚠️ 分类层级超过4级，已忽略: {' → '.join(path)} → {key}")
+            else:
+                # 当前层级遍历完毕，回到上一层继续
+                stack.pop()
     
     def _write_tags_csv(self, csv_rows, filename):
         """
         写入 CSV 文件
         
         参数:
-            csv_rows: CSV 行数据
+            csv_rows: CSV 行数据（列表或逐行生成的迭代器）
             filename: 文件名
+        
+        返回:
+            int: 写入的数据行数（不含表头）
         """
         csv_path = os.path.join(self.tags_dir, filename)
         
-        # 确保目录存在
-        os.makedirs(self.tags_dir, exist_ok=True)
-        
-        # 写入 CSV 文件（使用 utf-8-sig 编码，兼容 Excel）
-        with open(csv_path, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            # 写入表头
-            writer.writerow(['标签名', '标签值', '一级分类', '二级分类', '三级分类', '四级分类'])
-            # 写入数据
-            writer.writerows(csv_rows)
+        # 写入 CSV 文件（UTF-8 带 BOM，兼容 Excel）
+        # 按批格式化并编码后以二进制写入，加大写缓冲，大标签库只触发少量系统调用
+        # csv_rows 可以是逐行生成的迭代器，生成过程中出错时删除写了一半的文件
+        line_count = 0
+        try:
+            with open(csv_path, 'wb', buffering=_CSV_WRITE_BUFFER) as f:
+                f.write(_UTF8_BOM)
+                for chunk, chunk_lines in _iter_csv_chunks(chain((_TAGS_CSV_HEADER,), csv_rows)):
+                    f.write(chunk)
+                    line_count += chunk_lines
+        except BaseException:
+            try:
+                os.remove(csv_path)
+            except OSError:
+                pass
+            raise
+        return line_count - 1
     
     # --- Config.json 迁移 ---
     
@@ -994,28 +1464,25 @@ class MigrationTool:
         - vlm.providers: zhipu, siliconflow, custom 的 api_key
         """
         try:
-            # 1. 检查是否需要迁移
-            user_config_path = os.path.join(self.config_dir, "config.json")
-            if os.path.exists(user_config_path):
+            # 1. 检查是否需要迁移（复用 config 目录的列举结果）
+            if "config.json" in self._config_dir_entries:
                 return False
             
             # 2. 读取旧版 config.json
-            legacy_config_path = os.path.join(self.legacy_config_dir, "config.json")
+            legacy_config_path = self._legacy_paths['config']
             if not os.path.exists(legacy_config_path):
                 return False
             
             # 3. 加载旧版配置
-            with open(legacy_config_path, 'r', encoding='utf-8') as f:
-                legacy_config = json.load(f)
+            legacy_config = self._read_json(legacy_config_path)
             
             self._log(f"[config.json] 找到旧版配置，准备迁移到 v2.0 格式")
             
             # 4. 将完整的旧版配置保存到临时文件，供 config_manager 转换
-            migration_data_path = os.path.join(self.config_dir, ".migration_legacy_config.json")
-            os.makedirs(self.config_dir, exist_ok=True)
+            migration_data_path = self._paths['migration_legacy_config']
             
-            with open(migration_data_path, 'w', encoding='utf-8') as f:
-                json.dump(legacy_config, f, ensure_ascii=False, indent=2)
+            self._write_json(migration_data_path, legacy_config)
+            self._invalidate_config_dir_entries()
             
             return True
             
@@ -1045,29 +1512,18 @@ class MigrationTool:
                 }
                 self._log("提取百度翻译配置")
         
-        # 提取 LLM API Key
-        if 'llm' in legacy_config and 'providers' in legacy_config['llm']:
-            llm_providers = legacy_config['llm']['providers']
-            api_keys['llm'] = {}
-            
-            for provider_name in ['zhipu', 'siliconflow', 'custom']:
-                if provider_name in llm_providers:
-                    api_key = llm_providers[provider_name].get('api_key', '')
-                    if api_key:
-                        api_keys['llm'][provider_name] = api_key
-                        self._log(f"提取 LLM {provider_name} API Key")
-        
-        # 提取 VLM API Key
-        if 'vlm' in legacy_config and 'providers' in legacy_config['vlm']:
-            vlm_providers = legacy_config['vlm']['providers']
-            api_keys['vlm'] = {}
-            
-            for provider_name in ['zhipu', 'siliconflow', 'custom']:
-                if provider_name in vlm_providers:
-                    api_key = vlm_providers[provider_name].get('api_key', '')
-                    if api_key:
-                        api_keys['vlm'][provider_name] = api_key
-                        self._log(f"提取 VLM {provider_name} API Key")
+        # 提取 LLM / VLM API Key（只保留非空的 Key，每类汇总输出一行日志）
+        for section, label in (('llm', 'LLM'), ('vlm', 'VLM')):
+            if section in legacy_config and 'providers' in legacy_config[section]:
+                providers = legacy_config[section]['providers']
+                section_keys = {
+                    name: api_key
+                    for name in _LEGACY_KEY_PROVIDERS
+                    if name in providers and (api_key := providers[name].get('api_key', ''))
+                }
+                api_keys[section] = section_keys
+                if section_keys:
+                    self._log(f"提取 {label} API Key: {', '.join(section_keys)}")
         
         return api_keys
 
@@ -2,111 +2,703 @@
 视频帧提取工具模块
 提供基于帧索引的精确帧提取功能
 使用 imageio 替代 cv2 以减少依赖冲突并提高兼容性
+
+取帧优先由 ffmpeg 直接 seek 输出 JPEG，不可用时回退到 imageio 逐帧读取；
+回退路径的 JPEG 编码在安装了 OpenCV 时使用 cv2，否则使用 PIL（导入时选定）
 """
 
 import imageio
+import atexit
 import base64
+import binascii
+import json
 import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from io import BytesIO
 from PIL import Image
 import numpy as np
 
+from .common import _encode_jpeg_b64
 
-# ---帧提取核心功能---
+try:
+    import imageio_ffmpeg
+except ImportError:
+    imageio_ffmpeg = None
+
+# 可选：安装了 OpenCV 时用它编码 JPEG（libjpeg-turbo SIMD），否则使用 PIL
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# 回退路径的 JPEG 编码质量
+_JPEG_QUALITY = 60
+
+
+# ---ffmpeg 直接取帧---
+
+# mjpeg 编码质量（-q:v，2 最好 31 最差，5 与 PIL quality 60 左右的预览画质相当）
+_FFMPEG_JPEG_QSCALE = "5"
+_FFMPEG_TIMEOUT = 30
 
-def extract_frame_by_index(video_path, frame_index, force_rate=0):
+@lru_cache(maxsize=1)
+def _get_ffmpeg_exe():
+    """获取 imageio-ffmpeg 使用的 ffmpeg 可执行文件路径（不可用时返回 None）"""
+    if imageio_ffmpeg is None:
+        return None
+    try:
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def _seek_frames_jpeg(video_path, timestamp, offsets, max_dim=0):
     """
-    从视频中提取指定帧索引的图像
+    由 ffmpeg 在输入端 seek 到指定时间点，在同一进程中顺序解码并输出若干帧 JPEG
+    
+    输入端 seek 先跳到目标之前最近的关键帧再精确解码到目标帧，
+    不需要像逐帧读取那样从头解码，也不必经过 Python 侧的像素转换和编码；
+    多帧时用 select 滤镜按 seek 后的帧序号挑选，容器解析和解码器初始化只做一次，
+    输出够数后 ffmpeg 立即结束，不会解码到文件末尾
     
     Args:
         video_path: 视频文件路径
-        frame_index: 目标帧索引（基于 force_rate 后的帧序列）
-        force_rate: 强制帧率，0 表示使用原始帧率
+        timestamp: 第一帧的时间点（秒）
+        offsets: 要输出的帧相对第一帧的序号（升序，第一项为 0）
+        max_dim: 输出图像最长边上限，0 表示保持原始尺寸（不会放大）
+    
+    Returns:
+        list: 按 offsets 顺序的 JPEG 数据（视频提前结束时少于 offsets），
+            ffmpeg 不可用或未输出帧时返回 None
+    """
+    ffmpeg_exe = _get_ffmpeg_exe()
+    if ffmpeg_exe is None:
+        return None
+    
+    filters = []
+    if len(offsets) > 1:
+        filters.append("select='" + "+".join(f"eq(n\\,{offset})" for offset in offsets) + "'")
+    if max_dim > 0:
+        # 缩放到 min(max_dim, 原始宽) x min(max_dim, 原始高) 的框内并保持宽高比，小视频不放大
+        filters.append(f"scale='min({max_dim},iw)':'min({max_dim},ih)':force_original_aspect_ratio=decrease")
+    
+    cmd = [
+        ffmpeg_exe, "-nostdin", "-loglevel", "error",
+        "-ss", f"{timestamp:.6f}", "-i", video_path,
+        "-frames:v", str(len(offsets)), "-an", "-sn",
+    ]
+    if filters:
+        cmd += ["-vf", ",".join(filters)]
+    cmd += [
+        # 只输出选中的帧，不按恒定帧率补帧
+        "-vsync", "0",
+        "-q:v", _FFMPEG_JPEG_QSCALE, "-f", "image2pipe", "-vcodec", "mjpeg", "pipe:1",
+    ]
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            timeout=_FFMPEG_TIMEOUT,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    
+    if result.returncode != 0 or not result.stdout:
+        return None
+    return _split_jpeg_stream(result.stdout)
+
+
+def _split_jpeg_stream(data):
+    """
+    拆分 image2pipe 输出的连续 JPEG 数据
+    
+    ffmpeg 的 mjpeg 编码不带缩略图，熵编码数据中的 0xFF 都经过填充，
+    EOI 紧接 SOI（FFD9 FFD8）只会出现在两张图片的边界上
+    """
+    parts = data.split(_JPEG_BOUNDARY)
+    if len(parts) == 1:
+        return parts
+    return [parts[0] + _JPEG_EOI] + [_JPEG_SOI + part + _JPEG_EOI for part in parts[1:-1]] + [_JPEG_SOI + parts[-1]]
+
+
+_JPEG_SOI = b"\xff\xd8"
+_JPEG_EOI = b"\xff\xd9"
+_JPEG_BOUNDARY = _JPEG_EOI + _JPEG_SOI
+
+
+@lru_cache(maxsize=1)
+def _get_ffprobe_exe():
+    """
+    获取 ffprobe 可执行文件路径（不可用时返回 None）
+    
+    imageio-ffmpeg 只自带 ffmpeg，优先查找与其同目录的 ffprobe，其次查找 PATH
+    """
+    ffmpeg_exe = _get_ffmpeg_exe()
+    if ffmpeg_exe:
+        ffmpeg_dir, ffmpeg_name = os.path.split(ffmpeg_exe)
+        if ffmpeg_name.lower().startswith("ffmpeg"):
+            candidate = os.path.join(ffmpeg_dir, "ffprobe" + ffmpeg_name[len("ffmpeg"):])
+            if os.path.isfile(candidate):
+                return candidate
+    return shutil.which("ffprobe")
+
+
+def _parse_frame_rate(rate):
+    """解析 ffprobe 的 "分子/分母" 帧率字符串，无效时返回 0"""
+    try:
+        num, _, den = str(rate).partition("/")
+        num, den = float(num), float(den or 1)
+    except ValueError:
+        return 0
+    return num / den if num > 0 and den > 0 else 0
+
+
+def _ffprobe_video(video_path):
+    """
+    用 ffprobe 读取视频流的帧率、时长、总帧数和帧尺寸
+    
+    ffprobe 只解析容器头部（如 MP4 的 moov），不初始化解码器，也不遍历数据包。
+    ffprobe 给出的宽高是编码尺寸，而 ffmpeg 输出帧时会按旋转信息自动旋转，
+    因此旋转 90/270 度的视频交换宽高，与实际取到的帧尺寸保持一致。
+    容器未记录总帧数时（MKV/WebM、分片 MP4 等）按时长和帧率推算，不回退到遍历数据包
+    
+    Returns:
+        tuple: (fps, duration, total_frames, frame_size)；ffprobe 不可用、读取失败
+            或总帧数既未记录也无法推算时返回 None
+    """
+    ffprobe_exe = _get_ffprobe_exe()
+    if ffprobe_exe is None:
+        return None
+    
+    cmd = [
+        ffprobe_exe, "-v", "error", "-select_streams", "v:0",
+        "-show_entries",
+        "stream=avg_frame_rate,r_frame_rate,nb_frames,duration,width,height"
+        ":stream_tags=rotate:stream_side_data=rotation:format=duration",
+        "-of", "json", video_path,
+    ]
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            timeout=_FFMPEG_TIMEOUT,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        if result.returncode != 0:
+            return None
+        probe = json.loads(result.stdout)
+        stream = probe["streams"][0]
+        total_frames = int(stream.get("nb_frames") or 0)
+        duration = float(probe.get("format", {}).get("duration") or 0)
+        stream_duration = float(stream.get("duration") or 0)
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, IndexError):
+        return None
+    
+    fps = _parse_frame_rate(stream.get("avg_frame_rate")) or _parse_frame_rate(stream.get("r_frame_rate"))
+    if fps <= 0:
+        return None
+    if total_frames <= 0:
+        # 视频流时长不含其他流（如更长的音轨），优先使用
+        total_frames = int((stream_duration or duration) * fps)
+        if total_frames <= 0:
+            return None
+    
+    width, height = stream.get("width"), stream.get("height")
+    frame_size = (width, height) if width and height else None
+    if frame_size and _stream_rotation(stream) % 180 == 90:
+        frame_size = (height, width)
+    return fps, duration, total_frames, frame_size
+
+
+def _stream_rotation(stream):
+    """
+    读取 ffprobe 视频流的旋转角度（0~359）
+    
+    新版 ffmpeg 将旋转记录在显示矩阵的 side data 中，旧版记录在 rotate 标签中
+    """
+    rotation = stream.get("tags", {}).get("rotate")
+    for side_data in stream.get("side_data_list") or ():
+        if "rotation" in side_data:
+            rotation = side_data["rotation"]
+            break
+    try:
+        return int(round(float(rotation or 0))) % 360
+    except (TypeError, ValueError):
+        return 0
+
+
+# ---视频元数据缓存---
+
+# (路径, mtime_ns, 文件大小) -> (原始帧率, 时长, 原始总帧数, 帧尺寸)，超出上限时按插入顺序淘汰最早的条目
+_INFO_CACHE = {}
+_INFO_CACHE_MAX = 128
+
+
+def _cache_info(key, info):
+    """写入元数据缓存，超出上限时淘汰最早的条目"""
+    if len(_INFO_CACHE) >= _INFO_CACHE_MAX:
+        _INFO_CACHE.pop(next(iter(_INFO_CACHE)))
+    _INFO_CACHE[key] = info
+
+
+def _probe_video(video_path):
+    """
+    读取视频的原始帧率、时长、原始总帧数和帧尺寸
+    
+    优先用 ffprobe 读取容器头部；ffprobe 不可用或容器未记录总帧数时，
+    回退到 imageio 的 count_frames（对很多容器需要遍历全部数据包）。
+    前端每次拖动/取帧都会请求，因此按 (路径, mtime, 文件大小) 缓存，
+    文件未变化时直接复用；读取失败不缓存
     
     Returns:
-        dict: {success, data (base64 JPEG), width, height} 或 {success, error}
+        tuple: (original_fps, duration, total_original_frames, frame_size)，
+            取不到的数值为 0，frame_size 为 (宽, 高)，取不到时为 None
     """
-    reader = None
+    st = os.stat(video_path)
+    key = (video_path, st.st_mtime_ns, st.st_size)
+    cached = _INFO_CACHE.get(key)
+    if cached is not None:
+        return cached
+    
+    info = _ffprobe_video(video_path)
+    if info is not None:
+        _cache_info(key, info)
+        return info
+    
+    reader = imageio.get_reader(video_path, 'ffmpeg')
     try:
-        # 使用 imageio 读取视频
-        reader = imageio.get_reader(video_path, 'ffmpeg')
         meta = reader.get_meta_data()
-        
-        # 获取原始视频属性
         original_fps = meta.get('fps', 0)
-        total_original_frames = 0
+        duration = meta.get('duration', 0)
+        frame_size = meta.get('size') or None
         try:
             total_original_frames = reader.count_frames()
         except Exception:
             # 如果无法获取帧数，尝试从时长和帧率计算
-            duration = meta.get('duration', 0)
             if duration > 0 and original_fps > 0:
                 total_original_frames = int(duration * original_fps)
-        
-        if original_fps <= 0:
-            if reader: reader.close()
-            return {"success": False, "error": "无法获取视频帧率"}
-        
-        # 计算实际要读取的原始帧位置
-        if force_rate > 0 and abs(force_rate - original_fps) > 0.1:
-            # force_rate 会改变帧采样：从原始帧中按比例抽取
-            # 帧索引 i 对应的原始帧位置 = i * (original_fps / force_rate)
-            actual_frame_pos = int(frame_index * (original_fps / force_rate))
-        else:
-            actual_frame_pos = frame_index
-        
-        # 边界检查
-        if total_original_frames > 0:
-            if actual_frame_pos >= total_original_frames:
-                actual_frame_pos = total_original_frames - 1
-        if actual_frame_pos < 0:
-            actual_frame_pos = 0
-            
-        # 读取帧
+            else:
+                total_original_frames = 0
+    finally:
         try:
-            frame = reader.get_data(actual_frame_pos)
-        except (IndexError, ValueError):
-            # 如果超出范围，尝试读取最后一帧
-            try:
-                frame = reader.get_data(0)  # 兜底
-            except Exception:
-                if reader: reader.close()
-                return {"success": False, "error": f"无法读取帧 {actual_frame_pos}"}
-        
-        if frame is None:
-            if reader: reader.close()
-            return {"success": False, "error": f"读取到的帧为空 {actual_frame_pos}"}
-        
-        # imageio 返回的 frame 是 RGB 格式的 numpy 数组
-        # 转换为 PIL Image 进行处理
-        img = Image.fromarray(frame)
-        
-        # 编码为 JPEG
+            reader.close()
+        except Exception:
+            pass
+    
+    info = (original_fps, duration, total_original_frames, frame_size)
+    
+    # 既没有帧率也无法反推帧率的结果视为读取失败，不缓存
+    if original_fps > 0 or (duration > 0 and total_original_frames > 0):
+        _cache_info(key, info)
+    return info
+
+
+# ---imageio 读取器复用池---
+
+# (路径, mtime_ns, 文件大小) -> [reader, 上次读取的帧位置（未知时为 None）, 放回池中的时间]，按最近使用排序
+# 读取器取出后由调用方独占，用完再放回池中，因此同一读取器不会被多个线程同时使用
+# 读取器持有 ffmpeg 子进程和文件句柄（Windows 下会导致视频文件无法删除），
+# 空闲超过 _READER_IDLE_TIMEOUT 秒由定时器关闭，弹窗关闭和进程退出时也会释放
+_READER_POOL = OrderedDict()
+_READER_POOL_MAX = 4
+_READER_IDLE_TIMEOUT = 30.0
+_reader_pool_lock = threading.Lock()
+_reader_sweep_timer = None
+
+
+def _close_reader(reader):
+    """关闭读取器，忽略关闭时的异常"""
+    try:
+        reader.close()
+    except Exception:
+        pass
+
+
+def _acquire_reader(video_path):
+    """
+    从池中取出该视频的读取器，没有时新建
+    
+    回退路径下前端拖动取帧会连续请求同一视频，复用读取器可省去每帧都要付出的
+    ffmpeg 进程启动、容器解析和解码器初始化开销；文件被修改后键随之变化，不会取到旧读取器
+    
+    Returns:
+        tuple: (key, entry)，entry 为 [reader, 上次读取的帧位置, 放回池中的时间]
+    """
+    st = os.stat(video_path)
+    key = (video_path, st.st_mtime_ns, st.st_size)
+    with _reader_pool_lock:
+        entry = _READER_POOL.pop(key, None)
+    if entry is None:
+        entry = [imageio.get_reader(video_path, 'ffmpeg'), -1, 0.0]
+    return key, entry
+
+
+def _release_reader(key, entry):
+    """将读取器放回池中（最近使用），超出上限时关闭最久未使用的读取器"""
+    evicted = []
+    with _reader_pool_lock:
+        # 并发请求期间可能已有同一文件的读取器先放回，保留本次的读取器
+        previous = _READER_POOL.pop(key, None)
+        if previous is not None:
+            evicted.append(previous[0])
+        entry[2] = time.monotonic()
+        _READER_POOL[key] = entry
+        while len(_READER_POOL) > _READER_POOL_MAX:
+            evicted.append(_READER_POOL.popitem(last=False)[1][0])
+        _schedule_reader_sweep()
+    # 关闭读取器会等待 ffmpeg 进程退出，放在锁外进行
+    for reader in evicted:
+        _close_reader(reader)
+
+
+def _schedule_reader_sweep():
+    """池中有读取器且没有待执行的定时器时，按最久未使用的读取器到期时间启动清理定时器（需持有锁）"""
+    global _reader_sweep_timer
+    if not _READER_POOL or _reader_sweep_timer is not None:
+        return
+    oldest_released = next(iter(_READER_POOL.values()))[2]
+    delay = max(0.0, oldest_released + _READER_IDLE_TIMEOUT - time.monotonic())
+    _reader_sweep_timer = threading.Timer(delay, _sweep_idle_readers)
+    _reader_sweep_timer.daemon = True
+    _reader_sweep_timer.start()
+
+
+def _sweep_idle_readers():
+    """关闭空闲超时的读取器，池中仍有读取器时继续等待下一个到期时间"""
+    global _reader_sweep_timer
+    expired = []
+    with _reader_pool_lock:
+        _reader_sweep_timer = None
+        now = time.monotonic()
+        # 池按最近使用排序，遇到未到期的读取器即可停止
+        while _READER_POOL:
+            key, entry = next(iter(_READER_POOL.items()))
+            if now - entry[2] < _READER_IDLE_TIMEOUT:
+                break
+            del _READER_POOL[key]
+            expired.append(entry[0])
+        _schedule_reader_sweep()
+    for reader in expired:
+        _close_reader(reader)
+
+
+def release_video_readers(video_path=None):
+    """
+    关闭池中的读取器
+    
+    Args:
+        video_path: 只关闭该视频的读取器，None 表示关闭全部
+    """
+    global _reader_sweep_timer
+    released = []
+    with _reader_pool_lock:
+        for key in [k for k in _READER_POOL if video_path is None or k[0] == video_path]:
+            released.append(_READER_POOL.pop(key)[0])
+        if not _READER_POOL and _reader_sweep_timer is not None:
+            _reader_sweep_timer.cancel()
+            _reader_sweep_timer = None
+    for reader in released:
+        _close_reader(reader)
+
+
+# 进程退出时关闭剩余读取器，确保 ffmpeg 子进程随之退出
+atexit.register(release_video_readers)
+
+
+def _read_frame(entry, frame_pos):
+    """
+    用池中的读取器读取指定帧
+    
+    紧接上次位置的下一帧直接顺序读取，避免 imageio 随机访问时重新定位
+    （新建的读取器位置为 -1，下一帧即第 0 帧）
+    """
+    reader, last_pos = entry[0], entry[1]
+    entry[1] = None  # 读取失败时读取器位置未知，下次不走顺序读取
+    if last_pos is not None and frame_pos == last_pos + 1:
+        frame = reader.get_next_data()
+    else:
+        frame = reader.get_data(frame_pos)
+    entry[1] = frame_pos
+    return frame
+
+
+def _scaled_size(frame, max_dim):
+    """
+    计算帧按 max_dim 限制最长边后的尺寸
+    
+    Returns:
+        tuple: (宽, 高, 是否需要缩小)
+    """
+    height, width = frame.shape[:2]
+    scale = max_dim / max(width, height) if max_dim > 0 else 1
+    if scale < 1:
+        return max(1, int(width * scale)), max(1, int(height * scale)), True
+    return width, height, False
+
+
+def _encode_frame_pil(frame, max_dim=0, binary=False):
+    """
+    将 imageio 读取的 RGB 帧用 PIL 编码为 JPEG
+    
+    base64 输出时编码结果直接交给 base64 编码，不经过 BytesIO.getvalue 的整帧复制
+    
+    Args:
+        frame: RGB 帧（numpy 数组）
+        max_dim: 编码前将最长边缩小到此值以内，0 表示保持原始尺寸
+        binary: True 时返回 JPEG 字节，否则返回 base64 字符串
+    
+    Returns:
+        tuple: (JPEG 字节或 base64 字符串, 编码后的宽, 编码后的高)
+    """
+    width, height, downscale = _scaled_size(frame, max_dim)
+    img = Image.fromarray(frame)
+    if downscale:
+        img = img.resize((width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    if binary:
         buffer = BytesIO()
-        img.save(buffer, format="JPEG", quality=60)
-        
-        # Base64 编码
-        base64_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        width, height = img.size
-        
-        return {
+        img.save(buffer, format="JPEG", quality=_JPEG_QUALITY)
+        return buffer.getvalue(), width, height
+    # 复用线程内的编码缓冲区
+    encoded, _ = _encode_jpeg_b64(img, quality=_JPEG_QUALITY)
+    return encoded, width, height
+
+
+def _encode_frame_cv2(frame, max_dim=0, binary=False):
+    """
+    将 imageio 读取的 RGB 帧用 OpenCV 编码为 JPEG（参数和返回值同 PIL 版本）
+    
+    cv2.imencode 直接调用 libjpeg-turbo 的 SIMD 实现，编码失败时回退到 PIL
+    """
+    width, height, downscale = _scaled_size(frame, max_dim)
+    if downscale:
+        # INTER_AREA 缩小时画质好且有 SIMD 优化，缩小后再编码可同时减少编码和传输的数据量
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    # OpenCV 按 BGR 解释像素，反转通道轴只是视图，不复制像素
+    ok, buf = cv2.imencode('.jpg', frame[:, :, ::-1], [cv2.IMWRITE_JPEG_QUALITY, _JPEG_QUALITY])
+    if not ok:
+        return _encode_frame_pil(frame, binary=binary)
+    if binary:
+        return buf.tobytes(), width, height
+    # imencode 返回连续的 uint8 数组，binascii 可直接读取其缓冲区，不经过 tobytes 复制
+    return binascii.b2a_base64(buf, newline=False).decode('ascii'), width, height
+
+
+# 导入时按可用后端选定编码函数，取帧时不再逐次判断
+_encode_frame = _encode_frame_cv2 if cv2 is not None else _encode_frame_pil
+
+
+# ---帧提取核心功能---
+
+def _resolve_frame_pos(frame_index, force_rate, original_fps, total_original_frames):
+    """将 force_rate 后的帧索引换算为原始帧位置，并限制在有效范围内"""
+    if force_rate > 0 and abs(force_rate - original_fps) > 0.1:
+        # force_rate 会改变帧采样：从原始帧中按比例抽取
+        # 帧索引 i 对应的原始帧位置 = i * (original_fps / force_rate)
+        actual_frame_pos = int(frame_index * (original_fps / force_rate))
+    else:
+        actual_frame_pos = frame_index
+    
+    # 边界检查
+    if total_original_frames > 0:
+        if actual_frame_pos >= total_original_frames:
+            actual_frame_pos = total_original_frames - 1
+    if actual_frame_pos < 0:
+        actual_frame_pos = 0
+    return actual_frame_pos
+
+
+def _frame_result(frame, frame_index, actual_frame_pos, max_dim, return_binary=False):
+    """将 imageio 读取的帧编码为接口返回的结果字典"""
+    # imageio 返回的 frame 是 RGB 格式的 numpy 数组
+    height, width = frame.shape[:2]
+    encoded, encoded_width, encoded_height = _encode_frame(frame, max_dim, return_binary)
+    
+    result = {
+        "success": True,
+        "jpeg" if return_binary else "data": encoded,
+        "width": width,
+        "height": height,
+        "frame_index": frame_index,
+        "actual_frame_pos": actual_frame_pos
+    }
+    if (encoded_width, encoded_height) != (width, height):
+        result["encoded_width"], result["encoded_height"] = encoded_width, encoded_height
+    return result
+
+
+def _seek_frames_results(video_path, first_indices, original_fps, frame_size, max_dim, return_binary):
+    """
+    由一个 ffmpeg 进程 seek 到最前面的目标帧，再顺序解码取出其余各帧并生成结果字典
+    
+    后续各帧按与第一帧的帧位置差挑选（恒定帧率视频与按时间点 seek 取到的帧一致）
+    
+    Args:
+        first_indices: 原始帧位置 -> 结果中使用的帧索引
+    
+    Returns:
+        dict: 原始帧位置 -> 结果字典，ffmpeg 不可用或未输出的帧不在其中
+    """
+    positions = sorted(first_indices)
+    # 目标时间略早于第一帧的时间戳（0.01 帧），避免浮点误差导致落到下一帧
+    # 需要返回原始尺寸，只有元数据中有帧尺寸时才在 ffmpeg 中直接缩小
+    seek_max_dim = max_dim if frame_size else 0
+    jpegs = _seek_frames_jpeg(
+        video_path,
+        max(0.0, (positions[0] - 0.01) / original_fps),
+        [pos - positions[0] for pos in positions],
+        seek_max_dim,
+    )
+    
+    results_by_pos = {}
+    for actual_frame_pos, jpeg_data in zip(positions, jpegs or ()):
+        # 只解析 JPEG 头部获取尺寸，不解码像素
+        with Image.open(BytesIO(jpeg_data)) as img:
+            encoded_width, encoded_height = img.size
+        encoded = jpeg_data if return_binary else base64.b64encode(jpeg_data).decode('utf-8')
+        result = {
             "success": True,
-            "data": base64_data,
-            "width": width,
-            "height": height,
-            "frame_index": frame_index,
+            "jpeg" if return_binary else "data": encoded,
+            "width": encoded_width,
+            "height": encoded_height,
+            "frame_index": first_indices[actual_frame_pos],
             "actual_frame_pos": actual_frame_pos
         }
+        if seek_max_dim and tuple(frame_size) != (encoded_width, encoded_height):
+            result["width"], result["height"] = frame_size
+            result["encoded_width"], result["encoded_height"] = encoded_width, encoded_height
+        results_by_pos[actual_frame_pos] = result
+    return results_by_pos
+
+
+def _read_frames_results(video_path, first_indices, max_dim, return_binary):
+    """
+    用池中的 imageio 读取器按原始帧位置从前到后依次读取（ffmpeg 不可用或未能输出帧时的回退路径）
+    
+    主线程顺序解码，编码交给线程池与下一帧的解码并行（JPEG 编码期间 PIL/OpenCV 会释放 GIL）；
+    imageio 每次返回新分配的帧数组，交给编码线程前无需复制
+    
+    Args:
+        first_indices: 原始帧位置 -> 结果中使用的帧索引
+    
+    Returns:
+        dict: 原始帧位置 -> 结果字典
+    """
+    results_by_pos = {}
+    encode_tasks = []
+    pool_entry = None
+    try:
+        max_workers = min(4, os.cpu_count() or 4, len(first_indices))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pool_key, pool_entry = _acquire_reader(video_path)
+            reader_ok = True
+            for actual_frame_pos in sorted(first_indices):
+                try:
+                    frame = _read_frame(pool_entry, actual_frame_pos)
+                except (IndexError, ValueError):
+                    # 超出范围时读取第一帧兜底
+                    try:
+                        frame = _read_frame(pool_entry, 0)
+                    except (IndexError, ValueError):
+                        frame = None
+                
+                if frame is None:
+                    reader_ok = False
+                    results_by_pos[actual_frame_pos] = {"success": False, "error": f"无法读取帧 {actual_frame_pos}"}
+                    continue
+                future = executor.submit(
+                    _frame_result, frame, first_indices[actual_frame_pos], actual_frame_pos, max_dim, return_binary
+                )
+                encode_tasks.append((actual_frame_pos, future))
+            
+            # 读取成功，读取器可继续复用（连兜底帧都读取失败时状态不可信，交给 finally 关闭）
+            if reader_ok:
+                _release_reader(pool_key, pool_entry)
+                pool_entry = None
+            
+            for actual_frame_pos, future in encode_tasks:
+                results_by_pos[actual_frame_pos] = future.result()
+    finally:
+        # 未放回池中的读取器（读取出错、状态不可信）直接关闭
+        if pool_entry is not None:
+            _close_reader(pool_entry[0])
+    return results_by_pos
+
+
+def extract_frames_by_indices(video_path, frame_indices, force_rate=0, max_dim=0, return_binary=False):
+    """
+    提取多个帧索引的图像（单帧接口同样经由此函数，两者取到的帧完全一致）
+    
+    优先由一个 ffmpeg 进程 seek 到最前面的目标帧，再按帧位置顺序解码并直接输出各帧 JPEG；
+    ffmpeg 不可用或未能输出的帧回退到 imageio 按顺序读取。
+    重复的索引、换算后落到同一原始帧的索引只提取一次
+    
+    Args:
+        video_path: 视频文件路径
+        frame_indices: 目标帧索引列表（基于 force_rate 后的帧序列）
+        force_rate: 强制帧率，0 表示使用原始帧率
+        max_dim: 预览图最长边上限，超出时先缩小再编码，0 表示保持原始尺寸
+        return_binary: True 时以 jpeg 字段返回 JPEG 字节（供二进制接口直接输出），
+            不做 base64 编码
+    
+    Returns:
+        list: 与 frame_indices 一一对应的结果字典，
+            {success, data (base64 JPEG) 或 jpeg (bytes), width, height, frame_index, actual_frame_pos}
+            或 {success, error}；width/height 始终为视频帧的原始尺寸（便于前端做坐标换算），
+            缩小编码时另外返回 encoded_width/encoded_height
+    """
+    if not frame_indices:
+        return []
+    
+    try:
+        # 获取原始视频属性（同一文件的元数据走缓存）
+        original_fps, _, total_original_frames, frame_size = _probe_video(video_path)
+        if original_fps <= 0:
+            return [{"success": False, "error": "无法获取视频帧率"} for _ in frame_indices]
+        
+        # 原始帧位置 -> 换算到该位置的帧索引（保持首次出现的顺序）
+        indices_by_pos = {}
+        for frame_index in dict.fromkeys(frame_indices):
+            actual_frame_pos = _resolve_frame_pos(frame_index, force_rate, original_fps, total_original_frames)
+            indices_by_pos.setdefault(actual_frame_pos, []).append(frame_index)
+        first_indices = {pos: indices[0] for pos, indices in indices_by_pos.items()}
+        
+        results_by_pos = _seek_frames_results(
+            video_path, first_indices, original_fps, frame_size, max_dim, return_binary
+        )
+        
+        # ffmpeg 未能输出的帧回退到 imageio 读取
+        remaining = {pos: first_indices[pos] for pos in first_indices if pos not in results_by_pos}
+        if remaining:
+            results_by_pos.update(_read_frames_results(video_path, remaining, max_dim, return_binary))
+        
+        # 同一原始帧只提取一次，换算到同一位置的其他索引复用结果
+        results_by_index = {}
+        for pos, indices in indices_by_pos.items():
+            result = results_by_pos[pos]
+            results_by_index[indices[0]] = result
+            for frame_index in indices[1:]:
+                results_by_index[frame_index] = {**result, "frame_index": frame_index} if result["success"] else result
+        return [results_by_index[frame_index] for frame_index in frame_indices]
         
     except Exception as e:
-        return {"success": False, "error": str(e)}
-    finally:
-        if reader:
-            try:
-                reader.close()
-            except Exception:
-                pass
+        return [{"success": False, "error": str(e)} for _ in frame_indices]
+
+
+def extract_frame_by_index(video_path, frame_index, force_rate=0, max_dim=0, return_binary=False):
+    """
+    从视频中提取指定帧索引的图像（参数和结果格式见 extract_frames_by_indices）
+    
+    Returns:
+        dict: {success, data (base64 JPEG) 或 jpeg (bytes), width, height} 或 {success, error}
+    """
+    return extract_frames_by_indices(video_path, [frame_index], force_rate, max_dim, return_binary)[0]
 
 
 def get_video_frame_info(video_path, force_rate=0):
@@ -120,28 +712,14 @@ def get_video_frame_info(video_path, force_rate=0):
     Returns:
         dict: {success, original_fps, force_fps, total_frames, duration}
     """
-    reader = None
     try:
-        reader = imageio.get_reader(video_path, 'ffmpeg')
-        meta = reader.get_meta_data()
-        
-        original_fps = meta.get('fps', 0)
-        duration = meta.get('duration', 0)
-        
-        try:
-            total_original_frames = reader.count_frames()
-        except Exception:
-            if duration > 0 and original_fps > 0:
-                total_original_frames = int(duration * original_fps)
-            else:
-                total_original_frames = 0
+        original_fps, duration, total_original_frames, _ = _probe_video(video_path)
         
         if original_fps <= 0:
             # 某些格式可能没有 fps，尝试从时长和总帧数反推
             if duration > 0 and total_original_frames > 0:
                 original_fps = total_original_frames / duration
             else:
-                if reader: reader.close()
                 return {"success": False, "error": "无法获取视频帧率"}
         
         if duration <= 0:
@@ -167,9 +745,3 @@ def get_video_frame_info(video_path, force_rate=0):
         
     except Exception as e:
         return {"success": False, "error": str(e)}
-    finally:
-        if reader:
-            try:
-                reader.close()
-            except Exception:
-                pass